@@ -0,0 +1,235 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Owner, StatCounter, Tenant, User
+
+# counter kinds; keys in the comments
+TOTAL = "total"  # users / owners / tenants
+ROLE = "role"  # User.role
+SIGNUP_DAY = "signup_day"  # ISO date (TIME_ZONE) of created_at, for users that still exist
+OWNER_LOCATION = "owner_location"  # Owner.location
+
+# fields whose saved values decide which counters a row counts towards
+TRACKED_FIELDS = {User: ("role", "created_at"), Owner: ("location",), Tenant: ()}
+SNAPSHOT_ATTR = "_stat_fields"
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+DEFAULT_LOCATIONS = 20
+MAX_LOCATIONS = 100
+
+_pending = ContextVar("admin_stats_pending", default=None)
+_known = set()  # (kind, key) rows this process has seen exist
+
+
+# COUNTER KEYS
+def signup_day(created_at):
+    if created_at is None:
+        return None
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    return day.isoformat()
+
+
+def counter_keys(model, values):
+    if model is User:
+        return [(TOTAL, "users"), (ROLE, values["role"]), (SIGNUP_DAY, signup_day(values["created_at"]))]
+    if model is Owner:
+        return [(TOTAL, "owners"), (OWNER_LOCATION, values["location"])]
+    return [(TOTAL, "tenants")]
+
+
+def _model(instance):
+    return instance._meta.concrete_model
+
+
+def remember(instance):
+    """post_init: note the tracked values as loaded, so a save can tell what moved."""
+    loaded = instance.__dict__
+    instance.__dict__[SNAPSHOT_ATTR] = {f: loaded[f] for f in TRACKED_FIELDS[_model(instance)] if f in loaded}
+
+
+def _values(instance):
+    # deferred fields that were never loaded are taken as unchanged
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR, {})
+    return {f: instance.__dict__.get(f, snapshot.get(f)) for f in TRACKED_FIELDS[_model(instance)]}
+
+
+# SIGNAL HOOKS
+def row_saved(instance, created):
+    model = _model(instance)
+    current = _values(instance)
+    deltas = Counter(counter_keys(model, current))
+    if not created:
+        before = {**current, **instance.__dict__.get(SNAPSHOT_ATTR, {})}
+        deltas.subtract(counter_keys(model, before))
+    instance.__dict__[SNAPSHOT_ATTR] = current
+    record(deltas)
+    return deltas
+
+
+def row_deleted(instance):
+    model = _model(instance)
+    before = {**_values(instance), **instance.__dict__.get(SNAPSHOT_ATTR, {})}
+    deltas = Counter()
+    deltas.subtract(counter_keys(model, before))
+    record(deltas)
+    return deltas
+
+
+# BULK PATHS (no signals)
+def rows_created(instances):
+    deltas = Counter()
+    for instance in instances:
+        deltas.update(counter_keys(_model(instance), _values(instance)))
+    record(deltas)
+    return deltas
+
+
+def roles_changed(changes):
+    """changes: iterable of (old_role, new_role) for users written by bulk_update."""
+    deltas = Counter()
+    for old, new in changes:
+        deltas[(ROLE, old)] -= 1
+        deltas[(ROLE, new)] += 1
+    record(deltas)
+
+
+# WRITES
+@contextmanager
+def deferred():
+    """
+    Collect the deltas of every signal inside the block and write them at
+    the end, once per counter. Use it around deletes and saves that touch
+    many rows; without it each row costs an UPDATE.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set(Counter())
+    try:
+        yield
+        deltas = _pending.get()
+    finally:
+        _pending.reset(token)
+    apply(deltas)
+
+
+def record(deltas):
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(deltas)
+    else:
+        apply(deltas)
+
+
+def _match(keys):
+    query = Q()
+    for kind, key in keys:
+        query |= Q(kind=kind, key=key)
+    return query
+
+
+def _increment(deltas):
+    whens = [When(kind=kind, key=key, then=F("count") + n) for (kind, key), n in deltas.items()]
+    increment = Case(*whens, default=F("count"), output_field=StatCounter._meta.get_field("count"))
+    return StatCounter.objects.filter(_match(deltas)).update(count=increment)
+
+
+def _create(keys):
+    StatCounter.objects.bulk_create([StatCounter(kind=kind, key=key) for kind, key in keys], ignore_conflicts=True)
+    _known.update(keys)
+
+
+def apply(deltas):
+    """
+    count += n for each (kind, key), in the caller's transaction. Usually a
+    single UPDATE; rows this process has not seen yet are created first.
+    """
+    deltas = {key: n for key, n in deltas.items() if n and key[1] is not None}
+    if not deltas:
+        return
+    unseen = [key for key in deltas if key not in _known]
+    if unseen:
+        _create(unseen)
+    if _increment(deltas) < len(deltas):
+        # rows deleted under us, e.g. by a rebuild in another process
+        _known.clear()
+        existing = set(StatCounter.objects.filter(_match(deltas)).values_list("kind", "key"))
+        missing = [key for key in deltas if key not in existing]
+        _create(missing)
+        _increment({key: deltas[key] for key in missing})
+
+
+# BACKFILL
+def compute():
+    """Every counter from the tables themselves, with GROUP BY."""
+    counts = Counter()
+    counts[(TOTAL, "users")] = User.objects.count()
+    counts[(TOTAL, "owners")] = Owner.objects.count()
+    counts[(TOTAL, "tenants")] = Tenant.objects.count()
+    for role, n in User.objects.order_by().values_list("role").annotate(n=Count("id")):
+        counts[(ROLE, role)] = n
+    days = User.objects.order_by().annotate(day=TruncDate("created_at")).values_list("day").annotate(n=Count("id"))
+    for day, n in days:
+        counts[(SIGNUP_DAY, day.isoformat())] = n
+    for location, n in Owner.objects.order_by().values_list("location").annotate(n=Count("id")):
+        counts[(OWNER_LOCATION, location)] = n
+    return counts
+
+
+def rebuild(batch_size=1000):
+    with transaction.atomic():
+        counts = compute()
+        StatCounter.objects.all().delete()
+        StatCounter.objects.bulk_create(
+            [StatCounter(kind=kind, key=key, count=n) for (kind, key), n in counts.items() if n],
+            batch_size=batch_size,
+        )
+    _known.clear()
+    return len(counts)
+
+
+# READ
+def snapshot(days=DEFAULT_DAYS, locations=DEFAULT_LOCATIONS):
+    """
+    The dashboard numbers from two index reads whose size depends on days
+    and locations, not on how many users and owners there are.
+    """
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    rows = StatCounter.objects.filter(
+        Q(kind__in=(TOTAL, ROLE)) | Q(kind=SIGNUP_DAY, key__gte=since.isoformat())
+    ).values_list("kind", "key", "count")
+
+    totals = {"users": 0, "owners": 0, "tenants": 0}
+    roles = {role: 0 for role, _ in User.USER_TYPE}
+    signups = {}
+    for kind, key, n in rows:
+        if kind == TOTAL:
+            totals[key] = n
+        elif kind == ROLE:
+            roles[key] = n
+        else:
+            signups[key] = n
+
+    top = (
+        StatCounter.objects.filter(kind=OWNER_LOCATION, count__gt=0)
+        .order_by("-count", "key")
+        .values_list("key", "count")[:locations]
+    )
+    return {
+        "totals": totals,
+        "users_by_role": roles,
+        "signups_per_day": [
+            {"date": day, "count": signups.get(day, 0)}
+            for day in ((since + timedelta(days=i)).isoformat() for i in range(days))
+        ],
+        "owners_by_location": [{"location": key, "count": n} for key, n in top],
+    }
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+CLAIMS_CACHE_PREFIX = "auth:claims:"
+
+
+def claims_cache_key(user_id):
+    return f"{CLAIMS_CACHE_PREFIX}{user_id}"
+
+
+def claims_cache_timeout():
+    return getattr(settings, "AUTH_CLAIMS_CACHE_SECONDS", 60)
+
+
+def forget_user_claims(user_id):
+    cache.delete(claims_cache_key(user_id))
+
+
+def current_user_claims(user_id):
+    """
+    (role, is_staff) of an active user, or None if the user is gone or
+    disabled. Served from cache; the DB is read at most once per
+    AUTH_CLAIMS_CACHE_SECONDS per user.
+    """
+    key = claims_cache_key(user_id)
+    claims = cache.get(key)
+    if claims is None:
+        row = (
+            User.objects.filter(pk=user_id, is_active=True)
+            .values_list("role", "is_staff")
+            .first()
+        )
+        claims = list(row) if row else False
+        cache.set(key, claims, claims_cache_timeout())
+    return tuple(claims) if claims else None
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates from the signed role/is_staff claims written by
+    get_tokens_for_user, without loading the User row. A token is rejected
+    once its claims no longer match the cached snapshot, so deactivation,
+    deletion and role changes take effect within the cache lifetime.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        current = current_user_claims(user_id)
+        if current is None:
+            raise AuthenticationFailed("User not found or inactive", code="user_not_found")
+
+        role, is_staff = current
+        if validated_token.get("role") != role or bool(validated_token.get("is_staff")) != is_staff:
+            raise AuthenticationFailed("Token claims are out of date", code="token_not_valid")
+
+        return user
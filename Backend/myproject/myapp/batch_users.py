@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from . import admin_stats, events, response_cache, tombstones
+from .authentication import forget_user_claims
+
+User = get_user_model()
+
+PATCH_FIELDS = ("email", "address", "role", "phone")
+PATCH_ROLES = ("owner", "tenant", "admin")
+UPDATE_BATCH_SIZE = 500
+
+
+class BatchError(ValueError):
+    pass
+
+
+class ProtectedUsers(BatchError):
+    pass
+
+
+def max_batch():
+    return getattr(settings, "BATCH_USERS_MAX", 1000)
+
+
+def parse_ids(value):
+    if not isinstance(value, list) or not value:
+        raise BatchError("ids must be a non-empty list")
+    if len(value) > max_batch():
+        raise BatchError(f"at most {max_batch()} ids per request")
+    try:
+        return list(dict.fromkeys(int(pk) for pk in value))
+    except (TypeError, ValueError):
+        raise BatchError("ids must be integers")
+
+
+def parse_patches(value):
+    """{id: {field: value}} from [{"id": 1, "email": ...}, ...], validated like the PUT view."""
+    if not isinstance(value, list) or not value:
+        raise BatchError("users must be a non-empty list")
+    if len(value) > max_batch():
+        raise BatchError(f"at most {max_batch()} users per request")
+
+    patches = {}
+    for index, item in enumerate(value, start=1):
+        if not isinstance(item, dict):
+            raise BatchError(f"row {index} is not an object")
+        try:
+            pk = int(item.get("id"))
+        except (TypeError, ValueError):
+            raise BatchError(f"row {index} needs an integer id")
+        if pk in patches:
+            raise BatchError(f"row {index} repeats id {pk}")
+        unknown = set(item) - {"id", *PATCH_FIELDS}
+        if unknown:
+            raise BatchError(f"row {index} has fields that cannot be updated: {', '.join(sorted(unknown))}")
+
+        patch = {field: item[field] for field in PATCH_FIELDS if field in item}
+        if "role" in patch and patch["role"] not in PATCH_ROLES:
+            raise BatchError(f"row {index}: role must be owner/tenant/admin")
+        if "phone" in patch:
+            patch["phone"] = str(patch["phone"])
+        patches[pk] = patch
+    return patches
+
+
+def _forget(ids):
+    response_cache.invalidate(*response_cache.INVALIDATES["User"])
+    for pk in ids:
+        forget_user_claims(pk)
+
+
+# UPDATE
+def update_users(patches):
+    """
+    Apply patches in one transaction. Rows are read once, only values that
+    actually change are assigned, and bulk_update writes just the union of
+    changed columns for just the changed rows.
+    """
+    touched = {field for patch in patches.values() for field in patch}
+    changed, fields = [], set()
+    with transaction.atomic():
+        users = User.objects.select_for_update().only("id", *touched).in_bulk(list(patches))
+        roles = []
+        for pk, user in users.items():
+            diff = {f: v for f, v in patches[pk].items() if getattr(user, f) != v}
+            if diff:
+                if "role" in diff:
+                    roles.append((user.role, diff["role"]))
+                for field, value in diff.items():
+                    setattr(user, field, value)
+                changed.append(user)
+                fields.update(diff)
+
+        if changed:
+            # bulk_update skips auto_now; the ETags depend on updated_at
+            now = timezone.now()
+            for user in changed:
+                user.updated_at = now
+            User.objects.bulk_update(changed, sorted(fields) + ["updated_at"], batch_size=UPDATE_BATCH_SIZE)
+            admin_stats.roles_changed(roles)
+            events.publish_on_commit("user.updated", [
+                events.row_payload(user, ("id", *patches[user.pk], "updated_at")) for user in changed
+            ])
+            # bulk_update sends no post_save, so do what the User signals would
+            transaction.on_commit(lambda: _forget([u.pk for u in changed]))
+
+    return {
+        "updated": sorted(u.pk for u in changed),
+        "unchanged": sorted(set(users) - {u.pk for u in changed}),
+        "not_found": sorted(set(patches) - set(users)),
+    }
+
+
+# DELETE
+def delete_users(ids):
+    """
+    Delete ids with one filtered delete() in one transaction. Nothing is
+    deleted if any of them is an admin.
+    """
+    with transaction.atomic():
+        found = dict(User.objects.select_for_update().filter(id__in=ids).values_list("id", "role"))
+        admins = sorted(pk for pk, role in found.items() if role == "admin")
+        if admins:
+            raise ProtectedUsers(f"Admin users cannot be deleted: {', '.join(map(str, admins))}")
+        # the exclude keeps the rule even if a role changed since the check;
+        # the stats counters and owner tombstones are written once for the
+        # whole cascade
+        with admin_stats.deferred(), tombstones.deferred():
+            User.objects.filter(id__in=list(found)).exclude(role="admin").delete()
+
+    return {"deleted": sorted(found), "not_found": sorted(set(ids) - set(found))}
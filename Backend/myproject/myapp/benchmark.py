@@ -0,0 +1,277 @@
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from . import admin_stats
+from .geo import encode_geohash
+from .models import Owner, Tenant, User
+from .search import rebuild_index
+from .view.auth_views import get_tokens_for_user
+
+BENCH_PASSWORD = "bench-pass-123"
+LOCATIONS = ["Kathmandu", "Lalitpur", "Bhaktapur", "Pokhara", "Butwal", "Chitwan"]
+
+
+# DATABASE
+@contextmanager
+def bench_database(fast_hasher=False, login_throttle=False):
+    """
+    A throwaway SQLite file database for the length of the block. A file,
+    not :memory:, so the worker threads all see the same data.
+    """
+    fd, db_path = tempfile.mkstemp(suffix=".sqlite3", prefix="bench-")
+    os.close(fd)
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = db_path
+
+    hashers = ["django.contrib.auth.hashers.MD5PasswordHasher"] if fast_hasher else settings.PASSWORD_HASHERS
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(PASSWORD_HASHERS=hashers, LOGIN_THROTTLE_ENABLED=login_throttle):
+            cache.clear()
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+# SEED
+def seed(users, owners, tenants):
+    password = make_password(BENCH_PASSWORD)  # hash once, reuse for every row
+    User.objects.bulk_create(
+        [User(username="bench-admin", password=password, role="admin", is_staff=True)]
+        + [
+            User(username=f"bench-{i}", password=password, role="owner" if i % 2 else "tenant",
+                 email=f"bench-{i}@example.com", phone=f"98{i:08d}")
+            for i in range(users)
+        ],
+        batch_size=1000,
+    )
+
+    # link profiles to bench users of the same role, as far as they go
+    owner_users = _bench_user_ids("owner", owners)
+    tenant_users = _bench_user_ids("tenant", tenants)
+
+    rng = random.Random(11)
+    rows = []
+    for i in range(owners):
+        lat, lon = 27.7 + rng.uniform(-0.5, 0.5), 85.3 + rng.uniform(-0.5, 0.5)
+        rows.append(Owner(
+            user_id=owner_users[i] if i < len(owner_users) else None,
+            address=f"{i} {rng.choice(LOCATIONS)} Marg", phone=f"97{i:08d}",
+            location=f"{rng.choice(LOCATIONS)} Ward {rng.randint(1, 30)}",
+            latitude=lat, longitude=lon, geohash=encode_geohash(lat, lon),
+        ))
+    Owner.objects.bulk_create(rows, batch_size=1000)
+    rebuild_index()
+
+    Tenant.objects.bulk_create(
+        [
+            Tenant(user_id=tenant_users[i] if i < len(tenant_users) else None,
+                   address=f"{i} Marg", phone=f"96{i:08d}", location=rng.choice(LOCATIONS))
+            for i in range(tenants)
+        ],
+        batch_size=1000,
+    )
+    admin_stats.rebuild()  # bulk_create sends no signals
+
+
+def _bench_user_ids(role, limit):
+    return list(
+        User.objects.filter(username__startswith="bench-", role=role).order_by("id").values_list("id", flat=True)[:limit]
+    )
+
+
+# SCENARIOS
+class Context:
+    def __init__(self, run_id):
+        self.run_id = run_id
+        admin = User.objects.get(username="bench-admin")
+        self.admin_auth = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(admin)['access']}"}
+        self.user_ids = list(User.objects.filter(username__startswith="bench-").exclude(role="admin").order_by("id").values_list("id", flat=True))
+        self.usernames = list(User.objects.filter(id__in=self.user_ids[:200]).values_list("username", flat=True))
+
+        # the first profile users; the delete scenarios work from the other end of user_ids
+        self.auth = {True: self.admin_auth}
+        self.profile_usernames = {}
+        for role in ("owner", "tenant"):
+            users = list(User.objects.filter(**{f"{role}_profile__isnull": False}).order_by("id")[:20])
+            self.profile_usernames[role] = [u.username for u in users] or self.usernames
+            if users:
+                self.auth[role] = {"HTTP_AUTHORIZATION": f"Bearer {get_tokens_for_user(users[0])['access']}"}
+
+    def user_id(self, i):
+        return self.user_ids[i % len(self.user_ids)]
+
+    def username(self, i):
+        return self.usernames[i % len(self.usernames)]
+
+    def unique(self, prefix, i):
+        return f"{prefix}-{self.run_id}-{i}"
+
+
+def _login(ctx, i):
+    return {"username": ctx.username(i), "password": BENCH_PASSWORD}
+
+
+def _profile_login(role):
+    def data(ctx, i):
+        usernames = ctx.profile_usernames[role]
+        return {"username": usernames[i % len(usernames)], "password": BENCH_PASSWORD}
+    return data
+
+
+def _register(prefix, role=None):
+    def data(ctx, i):
+        row = {"username": ctx.unique(prefix, i), "password": BENCH_PASSWORD, "email": f"{ctx.unique(prefix, i)}@example.com"}
+        if role:
+            row["role"] = role
+        return row
+    return data
+
+
+def _import_csv(ctx, i):
+    lines = ["username,password,role"] + [f"{ctx.unique('imp', i * 10 + n)},{BENCH_PASSWORD},owner" for n in range(10)]
+    return "\n".join(lines) + "\n"
+
+
+# (name, url_name, method, path(ctx, i), kwargs(ctx, i), authenticated)
+# authenticated: False, True (as the bench admin) or "owner"/"tenant" (as a profile user)
+SCENARIOS = [
+    ("admin login", "login_admin", "post", lambda c, i: "/api/login/",
+     lambda c, i: {"data": {"username": "bench-admin", "password": BENCH_PASSWORD}}, False),
+    ("admin register (rejected)", "register_admin", "post", lambda c, i: "/api/register/",
+     lambda c, i: {"data": _register("adm")(c, i)}, False),
+    ("user login", "login_user", "post", lambda c, i: "/api/login-user/",
+     lambda c, i: {"data": _login(c, i)}, False),
+    ("user register", "register_user", "post", lambda c, i: "/api/register-user/",
+     lambda c, i: {"data": _register("reg", "tenant")(c, i)}, False),
+    ("async admin login", "alogin_admin", "post", lambda c, i: "/api/login-async/",
+     lambda c, i: {"data": {"username": "bench-admin", "password": BENCH_PASSWORD}, "content_type": "application/json"}, False),
+    ("async admin register", "aregister_admin", "post", lambda c, i: "/api/register-async/",
+     lambda c, i: {"data": _register("aadm")(c, i), "content_type": "application/json"}, False),
+    ("async user login", "alogin_user", "post", lambda c, i: "/api/login-user-async/",
+     lambda c, i: {"data": _login(c, i), "content_type": "application/json"}, False),
+    ("async user register", "aregister_user", "post", lambda c, i: "/api/register-user-async/",
+     lambda c, i: {"data": _register("areg", "tenant")(c, i), "content_type": "application/json"}, False),
+    ("list users", "list_all_users", "get", lambda c, i: "/api/list-users/", None, True),
+    ("list users filtered", "list_all_users", "get",
+     lambda c, i: f"/api/list-users/?role=owner&username_prefix=bench-{i % 10}&sort=-username", None, True),
+    ("list owners", "list_owners", "get", lambda c, i: "/api/list-owners/", None, True),
+    ("list tenants", "list_tenants", "get", lambda c, i: "/api/list-tenants/", None, True),
+    ("user detail", "user_detail_crud", "get", lambda c, i: f"/api/list/{c.user_id(i)}", None, True),
+    ("user update", "user_detail_crud", "put", lambda c, i: f"/api/list/{c.user_id(i)}",
+     lambda c, i: {"data": json.dumps({"address": f"bench {i}"}), "content_type": "application/json"}, True),
+    ("user delete", "user_detail_crud", "delete", lambda c, i: f"/api/list/{c.user_id(len(c.user_ids) - 1 - i)}", None, True),
+    ("batch update", "batch_update_users", "post", lambda c, i: "/api/batch-update-users/",
+     lambda c, i: {"data": json.dumps({"users": [{"id": c.user_id(i * 20 + n), "address": f"batch {i}"} for n in range(20)]}),
+                   "content_type": "application/json"}, True),
+    ("batch delete", "batch_delete_users", "post", lambda c, i: "/api/batch-delete-users/",
+     lambda c, i: {"data": json.dumps({"ids": [c.user_id(len(c.user_ids) // 2 + i * 5 + n) for n in range(5)]}),
+                   "content_type": "application/json"}, True),
+    ("bulk import", "bulk_import_users", "post", lambda c, i: "/api/bulk-import-users/",
+     lambda c, i: {"data": _import_csv(c, i), "content_type": "text/csv"}, True),
+    ("export users", "export_data", "get", lambda c, i: "/api/export-users/", None, True),
+    ("admin stats", "admin_stats", "get", lambda c, i: "/api/admin-stats/?days=90", None, True),
+    ("user events ticket", "user_events_ticket", "post", lambda c, i: "/api/user-events-ticket/", None, True),
+    ("user events", "user_events", "get", lambda c, i: "/api/user-events/?follow=0", None, True),
+    ("user events stats", "user_events_stats", "get", lambda c, i: "/api/user-events-stats/", None, True),
+    ("cache stats", "cache_stats", "get", lambda c, i: "/api/cache-stats/", None, True),
+    ("query metrics", "query_metrics", "get", lambda c, i: "/api/query-metrics/", None, True),
+    ("login throttle stats", "login_throttle_stats", "get", lambda c, i: "/api/login-throttle-stats/", None, True),
+    ("owner register", "owner_register", "post", lambda c, i: "/api/owner-register/",
+     lambda c, i: {"data": _register("own")(c, i)}, False),
+    ("owner login", "owner_login", "post", lambda c, i: "/api/owner-login/",
+     lambda c, i: {"data": _profile_login("owner")(c, i)}, False),
+    ("owner profile", "get_owner_profile", "get", lambda c, i: "/api/owner-profile/", None, "owner"),
+    ("all owners", "get_all_owners", "get", lambda c, i: "/api/all-owners/", None, True),
+    ("search owners", "search_owners", "get", lambda c, i: f"/api/search-owners/?q={LOCATIONS[i % len(LOCATIONS)][:4]}", None, True),
+    ("nearby owners", "nearby_owners", "get", lambda c, i: "/api/nearby-owners/?lat=27.7&lon=85.3&radius_km=2", None, True),
+    ("location autocomplete", "location_autocomplete", "get",
+     lambda c, i: f"/api/location-autocomplete/?q={LOCATIONS[i % len(LOCATIONS)][:1 + i % 4]}", None, True),
+    ("tenant register", "tenant_register", "post", lambda c, i: "/api/tenant-register/",
+     lambda c, i: {"data": _register("ten")(c, i)}, False),
+    ("tenant login", "tenant_login", "post", lambda c, i: "/api/tenant-login/",
+     lambda c, i: {"data": _profile_login("tenant")(c, i)}, False),
+    ("tenant profile", "get_tenant_profile", "get", lambda c, i: "/api/tenant-profile/", None, "tenant"),
+    ("all tenants", "get_all_tenants", "get", lambda c, i: "/api/all-tenants/", None, True),
+    ("recommend owners", "recommend_owners", "get",
+     lambda c, i: f"/api/recommend-owners/?location={LOCATIONS[i % len(LOCATIONS)]}&lat=27.7&lon=85.3", None, True),
+]
+
+
+def uncovered_routes(url_names):
+    covered = {scenario[1] for scenario in SCENARIOS}
+    return sorted(set(url_names) - covered)
+
+
+# RUN
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _call(ctx, scenario, i):
+    _, _, method, path, kwargs, authenticated = scenario
+    headers = ctx.auth.get(authenticated, ctx.admin_auth) if authenticated else {}
+    client = Client(raise_request_exception=False, **headers)
+    started = time.perf_counter()
+    response = getattr(client, method)(path(ctx, i), **(kwargs(ctx, i) if kwargs else {}))
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)
+    return time.perf_counter() - started, response.status_code
+
+
+def run_scenario(ctx, scenario, requests, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: _call(ctx, scenario, i), range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    statuses = Counter(r[1] for r in results)
+    errors = sum(n for code, n in statuses.items() if code >= 500)
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput_rps": round(requests / wall, 1) if wall else 0.0,
+        "error_rate": round(errors / requests, 4),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return human readable regressions of results against baseline."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] and current[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]} -> {current[key]}")
+        if before["throughput_rps"] and current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput_rps {before['throughput_rps']} -> {current['throughput_rps']}")
+        if current["error_rate"] > before["error_rate"]:
+            regressions.append(f"{name}: error_rate {before['error_rate']} -> {current['error_rate']}")
+    return regressions
@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from . import admin_stats, events, location_index, response_cache
+from .models import Owner, Tenant
+from .search import index_new_owners
+
+User = get_user_model()
+
+IMPORT_ROLES = ("owner", "tenant")
+IMPORT_FIELDS = ("username", "email", "password", "role", "first_name", "last_name", "address", "phone", "location")
+# every imported user gets the profile its role logs in with
+PROFILE_MODELS = {"owner": Owner, "tenant": Tenant}
+INSERT_BATCH_SIZE = 500
+# below this handing chunks to the pool costs more than it saves
+POOL_MIN_ROWS = 64
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# PARSING
+def parse_rows(raw, fmt):
+    text = raw.decode("utf-8-sig") if isinstance(raw, bytes) else raw
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    if fmt == "ndjson":
+        rows = []
+        for lineno, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                raise ImportFormatError(f"line {lineno} is not valid JSON")
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"line {lineno} is not a JSON object")
+            rows.append(row)
+        return rows
+    raise ImportFormatError("format must be csv or ndjson")
+
+
+def detect_format(content_type, filename=""):
+    content_type = (content_type or "").lower()
+    filename = (filename or "").lower()
+    if "csv" in content_type or filename.endswith(".csv"):
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+# VALIDATION
+def validate_rows(rows):
+    """
+    Split rows into (valid, errors). Duplicates are checked against the
+    batch itself and against existing usernames with one IN query.
+    """
+    valid, errors = [], []
+    seen = set()
+    for index, row in enumerate(rows, start=1):
+        row = {k: str(row.get(k) or "").strip() for k in IMPORT_FIELDS}
+        username, password, role = row["username"], row["password"], row["role"]
+        if not username or not password:
+            errors.append({"row": index, "username": username, "error": "username and password are required"})
+        elif role not in IMPORT_ROLES:
+            errors.append({"row": index, "username": username, "error": "role must be owner/tenant"})
+        elif username in seen:
+            errors.append({"row": index, "username": username, "error": "Duplicate username in upload"})
+        else:
+            seen.add(username)
+            valid.append((index, row))
+
+    existing = set(
+        User.objects.filter(username__in=[row["username"] for _, row in valid])
+        .values_list("username", flat=True)
+    )
+    if existing:
+        kept = []
+        for index, row in valid:
+            if row["username"] in existing:
+                errors.append({"row": index, "username": row["username"], "error": "Username already exists"})
+            else:
+                kept.append((index, row))
+        valid = kept
+    return valid, errors
+
+
+# HASHING
+def hash_workers():
+    return getattr(settings, "BULK_IMPORT_HASH_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+def get_pool():
+    """
+    Threads shared by every import in this process, apart from the login
+    pool in hashing.py so a large import cannot queue logins behind it.
+    PBKDF2 releases the GIL, so the chunks hash in parallel in-process;
+    nothing is forked from the request worker.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=hash_workers(), thread_name_prefix="import-hash")
+    return _pool
+
+
+def _hash_chunk(passwords):
+    return [make_password(p) for p in passwords]
+
+
+def hash_passwords(passwords):
+    workers = hash_workers()
+    if workers <= 1 or len(passwords) < POOL_MIN_ROWS:
+        return _hash_chunk(passwords)
+
+    size = max(1, -(-len(passwords) // (workers * 4)))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    hashed = []
+    for part in get_pool().map(_hash_chunk, chunks):
+        hashed.extend(part)
+    return hashed
+
+
+# INSERT
+def _build_user(row, password_hash):
+    return User(
+        username=row["username"],
+        email=row["email"],
+        password=password_hash,
+        role=row["role"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        address=row["address"],
+        phone=row["phone"],
+    )
+
+
+def _build_profile(user, row):
+    return PROFILE_MODELS[row["role"]](
+        user=user, address=row["address"], phone=row["phone"], location=row["location"],
+    )
+
+
+def _fill_pks(objects, model, key):
+    # MySQL hands back no ids from a bulk INSERT
+    if objects and objects[0].pk is None:
+        ids = dict(model.objects.filter(**{f"{key}__in": [getattr(o, key) for o in objects]}).values_list(key, "id"))
+        for obj in objects:
+            obj.pk = ids.get(getattr(obj, key))
+
+
+def create_profiles(users, rows):
+    """
+    bulk_create the Owner/Tenant profiles of freshly inserted users and do
+    what their post_save signals would: search postings, stats counters,
+    the location index, events and the cached lists.
+    """
+    profiles = [_build_profile(user, row) for user, row in zip(users, rows)]
+    for model in PROFILE_MODELS.values():
+        batch = [profile for profile in profiles if isinstance(profile, model)]
+        if not batch:
+            continue
+        model.objects.bulk_create(batch)
+        _fill_pks(batch, model, "user_id")
+        deltas = admin_stats.rows_created(batch)
+        if model is Owner:
+            index_new_owners(batch)
+            location_index.counters_changed(deltas)
+        events.publish_on_commit(f"{model._meta.model_name}.created", [events.row_payload(p) for p in batch])
+        transaction.on_commit(partial(response_cache.invalidate, *response_cache.INVALIDATES[model.__name__]))
+
+
+def import_users(rows):
+    valid, errors = validate_rows(rows)
+    hashes = hash_passwords([row["password"] for _, row in valid])
+
+    created = 0
+    for start in range(0, len(valid), INSERT_BATCH_SIZE):
+        batch = valid[start:start + INSERT_BATCH_SIZE]
+        users = [_build_user(row, h) for (_, row), h in zip(batch, hashes[start:start + INSERT_BATCH_SIZE])]
+        try:
+            # one stats counter write for the users and their profiles
+            with transaction.atomic(), admin_stats.deferred():
+                User.objects.bulk_create(users)
+                _fill_pks(users, User, "username")
+                # bulk_create sends no post_save
+                admin_stats.rows_created(users)
+                events.publish_on_commit("user.created", [events.row_payload(user) for user in users])
+                create_profiles(users, [row for _, row in batch])
+            created += len(users)
+        except IntegrityError:
+            # a concurrent signup took one of the names; isolate it row by row.
+            # The rolled back bulk_create may have left ids on the objects,
+            # which would make save() an UPDATE of rows that do not exist
+            for (index, row), user in zip(batch, users):
+                user.pk = None
+                user._state.adding = True
+                try:
+                    with transaction.atomic(), admin_stats.deferred():
+                        user.save()
+                        _build_profile(user, row).save()
+                    created += 1
+                except IntegrityError:
+                    errors.append({"row": index, "username": row["username"], "error": "Username already exists"})
+
+    errors.sort(key=lambda e: e["row"])
+    return {"created": created, "failed": len(errors), "errors": errors}
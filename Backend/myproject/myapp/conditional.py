@@ -0,0 +1,49 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def list_seed(queryset):
+    """
+    ETag seed for a list: one aggregate query, COUNT(*), MAX(id) and
+    MAX(updated_at). Inserts move the max id, updates the max updated_at
+    and deletes the count. Lists send no Last-Modified: a delete does not
+    move MAX(updated_at), and If-Modified-Since only has second precision,
+    so it would answer 304 for a list that changed.
+    """
+    agg = queryset.order_by().aggregate(count=Count("id"), last_id=Max("id"), last=Max("updated_at"))
+    last = agg["last"]
+    return f"{agg['count']}:{agg['last_id']}:{last.isoformat() if last else '-'}"
+
+
+def record_validators(pk, updated_at):
+    return f"{pk}:{updated_at.isoformat()}", updated_at
+
+
+def make_etag(request, seed):
+    # the same rows render differently per page/filters and per format
+    key = "|".join((seed, request.get_full_path(), request.META.get("HTTP_ACCEPT", "")))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 response if the client's If-None-Match / If-Modified-Since
+    still matches, else None. Call before doing the expensive part.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Accept", "Authorization"))
+    return response
@@ -0,0 +1,125 @@
+import hashlib
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from .streaming import keep_context
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_KEY = "db:pin:{}"
+
+
+@dataclass
+class RoutingState:
+    client: str
+    use_replica: bool = False
+    replica: str = ""
+    wrote: bool = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def use_replica(view):
+    """Mark a read-only view whose GET queries may be served by a replica."""
+    view.use_replica = True
+    return view
+
+
+def client_key(request):
+    ident = request.META.get("HTTP_AUTHORIZATION") or request.META.get("REMOTE_ADDR", "")
+    return hashlib.sha1(ident.encode()).hexdigest()
+
+
+# MIDDLEWARE
+class ReplicaRoutingMiddleware:
+    """
+    Routes reads of @use_replica views to a replica. After a client writes,
+    its reads stay on the primary for REPLICA_PIN_SECONDS so it always sees
+    its own changes despite replication lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(client=client_key(request))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(state, token)
+        return self.route_stream(response, state)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM threads see this state
+        state = RoutingState(client=client_key(request))
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(state, token)
+        return self.route_stream(response, state)
+
+    def finish(self, state, token):
+        if state.wrote:
+            cache.set(PIN_KEY.format(state.client), 1, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+        _state.reset(token)
+
+    def route_stream(self, response, state):
+        # a streamed body (NDJSON lists, exports) queries as it is read, after
+        # the view has returned; it reads from the same database as the view
+        if getattr(response, "streaming", False):
+            keep_context(response, _state, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        replicas = replica_aliases()
+        if (
+            state is not None
+            and replicas
+            and getattr(view_func, "use_replica", False)
+            and request.method in READ_METHODS
+            and not cache.get(PIN_KEY.format(state.client))
+        ):
+            state.use_replica = True
+            state.replica = random.choice(replicas)
+        return None
+
+
+# ROUTER
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.use_replica and not state.wrote:
+            return state.replica
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import Owner, Tenant, User
+
+# what an event carries for each model; never the password hash
+EVENT_FIELDS = {
+    User: ("id", "username", "email", "role", "phone", "address", "created_at", "updated_at"),
+    Owner: ("id", "user_id", "location", "address", "phone", "latitude", "longitude", "updated_at"),
+    Tenant: ("id", "user_id", "location", "address", "phone", "updated_at"),
+}
+RESET = "reset"  # tells the client to reload; the gap since its Last-Event-ID is gone
+TICKET_PREFIX = "events:ticket:"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    seq: int
+    kind: str
+    data: dict
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(self.data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+# SUBSCRIPTIONS
+class Subscription:
+    """
+    One stream's queue, owned by its event loop. Publishers hand events
+    over with call_soon_threadsafe from whatever thread saved the row. A
+    reader more than max_pending events behind is cut off instead of
+    buffering without bound; it reconnects and resumes from the history.
+    """
+
+    OVERFLOW = object()
+
+    def __init__(self, bus, loop, max_pending):
+        self.bus = bus
+        self.loop = loop
+        self.max_pending = max_pending
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # the loop is gone
+            self.bus.unsubscribe(self)
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_pending:
+            self.overflowed = True
+            self.bus.unsubscribe(self, dropped=True)
+            self.queue.put_nowait(self.OVERFLOW)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """The next event, None on timeout, OVERFLOW once cut off."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+# BUS
+class EventBus:
+    """
+    In-process pub/sub with a ring buffer of recent events for
+    Last-Event-ID resume. Ids are "<epoch>-<seq>"; the epoch changes when
+    the process restarts, so a stale id is recognised and answered with a
+    reset. Every worker has its own bus and sees only its own writes; more
+    than one worker needs a shared broker behind publish()/subscribe().
+    """
+
+    def __init__(self, history=None):
+        self._lock = threading.Lock()
+        self.epoch = f"{os.getpid():x}{time.time_ns():x}"
+        self.seq = 0
+        self.history = deque(maxlen=history or _setting("EVENTS_HISTORY", 1000))
+        self.subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, kind, data):
+        with self._lock:
+            self.seq += 1
+            event = Event(f"{self.epoch}-{self.seq}", self.seq, kind, data)
+            self.history.append(event)
+            self.published += 1
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self):
+        subscription = Subscription(self, asyncio.get_running_loop(), _setting("EVENTS_MAX_PENDING", 256))
+        with self._lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription, dropped=False):
+        with self._lock:
+            if subscription in self.subscribers:
+                self.subscribers.discard(subscription)
+                self.dropped += dropped
+
+    def since(self, last_event_id):
+        """(events after last_event_id, True) or ([], False) when they are no longer all here."""
+        if not last_event_id:
+            return [], True
+        epoch, _, seq = last_event_id.rpartition("-")
+        with self._lock:
+            history = list(self.history)
+            current = self.seq
+        try:
+            seq = int(seq)
+        except ValueError:
+            return [], False
+        if epoch != self.epoch or seq > current:
+            return [], False
+        if history and seq < history[0].seq - 1:
+            return [], False
+        return [event for event in history if event.seq > seq], True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self.subscribers),
+                "published": self.published,
+                "dropped_subscribers": self.dropped,
+                "history": len(self.history),
+                "last_event_id": f"{self.epoch}-{self.seq}" if self.seq else None,
+            }
+
+
+bus = EventBus()
+
+
+# MODEL CHANGES
+def row_payload(instance, fields=None):
+    # only what is loaded, so a deferred field never costs a query
+    loaded = instance.__dict__
+    allowed = EVENT_FIELDS[instance._meta.concrete_model]
+    return {f: loaded[f] for f in fields or allowed if f in allowed and f in loaded}
+
+
+def publish_on_commit(kind, payloads):
+    """Publish once the surrounding transaction commits; a rollback sends nothing."""
+    for data in payloads:
+        transaction.on_commit(partial(bus.publish, kind, data))
+
+
+def row_saved(instance, created):
+    name = instance._meta.model_name
+    publish_on_commit(f"{name}.{'created' if created else 'updated'}", [row_payload(instance)])
+
+
+def row_deleted(instance):
+    publish_on_commit(f"{instance._meta.model_name}.deleted", [{"id": instance.pk}])
+
+
+# TICKETS
+# EventSource cannot send an Authorization header. Rather than a JWT in
+# the query string (and so in every access log), the client trades its
+# token for a random ticket that opens one stream within seconds.
+def issue_ticket(user_id):
+    ticket = secrets.token_urlsafe(24)
+    cache.set(TICKET_PREFIX + ticket, user_id, _setting("EVENTS_TICKET_SECONDS", 30))
+    return ticket
+
+
+async def aredeem_ticket(ticket):
+    """The user id the ticket was issued to, or None. A ticket works once."""
+    key = TICKET_PREFIX + ticket
+    user_id = await cache.aget(key)
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return user_id
+
+
+# STREAM
+def _replay(last_event_id):
+    chunks = [b"retry: 3000\n\n"]  # ms before the browser reconnects
+    events, complete = bus.since(last_event_id)
+    if not complete:
+        chunks.append(f"event: {RESET}\ndata: {{}}\n\n".encode())
+    chunks.extend(event.encode() for event in events)
+    return chunks, events[-1].seq if events else 0
+
+
+def replay(last_event_id=None):
+    """The events after last_event_id (or a reset if they have aged out), then the end."""
+    return _replay(last_event_id)[0]
+
+
+async def stream(last_event_id=None):
+    """
+    replay(), then live events until EVENTS_MAX_STREAM_SECONDS with a
+    keep-alive comment every EVENTS_HEARTBEAT_SECONDS. Subscribes before
+    reading the history so nothing published in between is missed.
+    """
+    subscription = bus.subscribe()
+    try:
+        chunks, seen = _replay(last_event_id)
+        for chunk in chunks:
+            yield chunk
+
+        heartbeat = _setting("EVENTS_HEARTBEAT_SECONDS", 15)
+        deadline = time.monotonic() + _setting("EVENTS_MAX_STREAM_SECONDS", 300)
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = await subscription.get(min(heartbeat, remaining))
+            if event is None:
+                yield b": keep-alive\n\n"
+            elif event is Subscription.OVERFLOW:
+                return  # the client reconnects with its Last-Event-ID
+            elif event.seq > seen:  # already sent if it arrived during the replay
+                yield event.encode()
+    finally:
+        bus.unsubscribe(subscription)
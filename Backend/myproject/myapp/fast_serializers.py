@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from .serializers import OwnerSerializer, TenantSerializer, UserSerializer
+
+
+def _datetime(tz):
+    # same steps as DRF's DateTimeField.to_representation with ISO_8601,
+    # with the current timezone looked up once per list instead of per value
+    if tz is None:
+        def convert(value):
+            return None if value is None else value.isoformat()
+        return convert
+
+    if str(tz) == "UTC":
+        # the database already hands back UTC datetimes
+        def convert(value):
+            if value is None:
+                return None
+            value = value.isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return convert
+
+    def convert(value):
+        if value is None:
+            return None
+        if value.tzinfo is not None and value.tzinfo is not tz:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    return convert
+
+
+def datetime_converter():
+    """datetime -> str exactly as the JSON pages render it, for the streamed formats."""
+    return _datetime(timezone.get_current_timezone() if settings.USE_TZ else None)
+
+
+def _date(tz):
+    return lambda value: None if value is None else value.isoformat()
+
+
+def _str(tz):
+    return lambda value: None if value is None else str(value)
+
+
+CONVERTERS = {
+    serializers.DateTimeField: _datetime,
+    serializers.DateField: _date,
+    serializers.DecimalField: _str,
+}
+
+
+class CompiledSerializer:
+    """
+    Read-only fast path for a ModelSerializer. Rows are fetched as
+    values_list() tuples and turned into dicts by a function generated
+    once per serializer, so there are no Field objects, no model instances
+    and no per-field dispatch on the hot path. Output matches
+    serializer_class(many=True).data for plain model fields.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        declared = serializer_class().fields
+        self.serializer_class = serializer_class
+        self.fields = tuple(fields) if fields is not None else tuple(declared)
+        self._subsets = {}
+
+        factories = []
+        items = []
+        for index, name in enumerate(self.fields):
+            field = declared[name]
+            if field.source != name:
+                raise TypeError(f"{serializer_class.__name__}.{name} is not a plain model field")
+            factory = next((fn for cls, fn in CONVERTERS.items() if isinstance(field, cls)), None)
+            if factory is None:
+                items.append(f"{name!r}: row[{index}]")
+            else:
+                factories.append(factory)
+                items.append(f"{name!r}: _c{len(factories) - 1}(row[{index}])")
+
+        params = ", ".join(f"_c{i}" for i in range(len(factories)))
+        source = (
+            f"def build({params}):\n"
+            f"    def to_dict(row):\n"
+            f"        return {{{', '.join(items)}}}\n"
+            f"    return to_dict\n"
+        )
+        namespace = {}
+        exec(compile(source, f"<compiled {serializer_class.__name__}>", "exec"), namespace)
+        self._build = namespace["build"]
+        self._factories = factories
+
+    def only(self, fields):
+        """Compiled serializer for a subset of the fields, built once per subset."""
+        fields = tuple(fields)
+        if fields == self.fields:
+            return self
+        if fields not in self._subsets:
+            self._subsets[fields] = CompiledSerializer(self.serializer_class, fields)
+        return self._subsets[fields]
+
+    def row_converter(self):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return self._build(*(factory(tz) for factory in self._factories))
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.fields)
+
+    def serialize(self, queryset):
+        to_dict = self.row_converter()
+        return [to_dict(row) for row in self.rows(queryset)]
+
+    def serialize_ordered(self, queryset, ids, with_ids=False):
+        """
+        Serialize the rows with the given ids, in that order. Ids with no
+        row are skipped, so callers that attach per-id values pass
+        with_ids=True and get (id, row) pairs to key them by.
+        """
+        rows = queryset.filter(id__in=ids).values_list("id", *self.fields)
+        by_id = {row[0]: row[1:] for row in rows}
+        to_dict = self.row_converter()
+        if with_ids:
+            return [(i, to_dict(by_id[i])) for i in ids if i in by_id]
+        return [to_dict(by_id[i]) for i in ids if i in by_id]
+
+
+user_fast = CompiledSerializer(UserSerializer)
+owner_fast = CompiledSerializer(OwnerSerializer)
+tenant_fast = CompiledSerializer(TenantSerializer)
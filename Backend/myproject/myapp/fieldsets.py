@@ -0,0 +1,64 @@
+USER_FIELDS = (
+    "id", "username", "first_name", "last_name", "email",
+    "role", "address", "phone", "created_at", "updated_at",
+)
+OWNER_FIELDS = (
+    "id", "address", "phone", "location", "latitude", "longitude",
+    "geohash", "created_at", "updated_at",
+)
+OWNER_PUBLIC_FIELDS = (
+    "id", "address", "phone", "location", "latitude", "longitude", "updated_at",
+)
+TENANT_FIELDS = ("id", "address", "phone", "location", "created_at", "updated_at")
+
+# resource -> requester role -> fields that role may ask for
+WHITELISTS = {
+    "user": {"admin": USER_FIELDS},
+    "owner": {"admin": OWNER_FIELDS, "owner": OWNER_FIELDS, "tenant": OWNER_PUBLIC_FIELDS},
+    "tenant": {"admin": TENANT_FIELDS, "tenant": TENANT_FIELDS},
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def requester_role(request):
+    user = request.user
+    role = getattr(user, "role", None)
+    if role == "admin" or getattr(user, "is_staff", False):
+        return "admin"
+    return role or "tenant"
+
+
+def _split(value):
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+def select_fields(request, resource, default):
+    """
+    Columns to SELECT and return, from ?fields=a,b and/or ?exclude=c,
+    checked against what the requester's role may see. Without either
+    parameter this is `default` minus anything the role may not see.
+    """
+    allowed = WHITELISTS[resource].get(requester_role(request), ())
+    params = request.query_params
+
+    if "fields" in params:
+        fields = list(dict.fromkeys(_split(params["fields"])))
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise InvalidFields(f"Unknown or forbidden fields: {', '.join(unknown)}")
+    else:
+        fields = [f for f in default if f in allowed]
+
+    if "exclude" in params:
+        excluded = set(_split(params["exclude"]))
+        unknown = excluded - set(allowed)
+        if unknown:
+            raise InvalidFields(f"Unknown or forbidden fields: {', '.join(sorted(unknown))}")
+        fields = [f for f in fields if f not in excluded]
+
+    if not fields:
+        raise InvalidFields("No fields selected")
+    return tuple(fields)
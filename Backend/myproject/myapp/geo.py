@@ -0,0 +1,131 @@
+import math
+
+from django.db.models import Q
+
+from .query_utils import prefix_q
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_COVER_CELLS = 16
+
+
+# GEOHASH
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash interleaves starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(lat_degrees, lon_degrees) covered by one geohash cell."""
+    total = 5 * precision
+    lon_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covering_cells(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Smallest set of equal-size geohash prefixes that covers the box, using
+    the finest precision that needs no more than max_cells prefixes.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        lat_from = math.floor((min_lat + 90.0) / lat_step)
+        lat_to = math.floor((max_lat + 90.0) / lat_step)
+        lon_from = math.floor((min_lon + 180.0) / lon_step)
+        lon_to = math.floor((max_lon + 180.0) / lon_step)
+        if (lat_to - lat_from + 1) * (lon_to - lon_from + 1) > max_cells:
+            continue
+
+        cells = set()
+        for i in range(lat_from, lat_to + 1):
+            lat = min(-90.0 + (i + 0.5) * lat_step, 90.0)
+            for j in range(lon_from, lon_to + 1):
+                lon = min(-180.0 + (j + 0.5) * lon_step, 180.0)
+                cells.add(encode_geohash(lat, lon, precision))
+        return sorted(cells)
+    return [""]
+
+
+# DISTANCE
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(lat, lon, radius_km):
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+# QUERIES
+def bbox_filter(min_lat, min_lon, max_lat, max_lon):
+    """
+    Q object that narrows with geohash prefix range scans first and then
+    trims the cell overhang with an exact coordinate check.
+    """
+    prefixes = Q()
+    for cell in covering_cells(min_lat, min_lon, max_lat, max_lon):
+        prefixes |= prefix_q("geohash", cell)
+    return prefixes & Q(
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon),
+    )
+
+
+def owners_in_bbox(queryset, min_lat, min_lon, max_lat, max_lon):
+    return queryset.filter(bbox_filter(min_lat, min_lon, max_lat, max_lon))
+
+
+def owners_within_radius(queryset, lat, lon, radius_km, limit=None):
+    """
+    Return [(owner_id, distance_km)] sorted by distance. Candidates come
+    from the bounding box of the circle; only those pay for a haversine,
+    and only their id and coordinates are fetched.
+    """
+    candidates = owners_in_bbox(queryset, *radius_bbox(lat, lon, radius_km))
+    hits = []
+    for pk, owner_lat, owner_lon in candidates.values_list("id", "latitude", "longitude"):
+        distance = haversine_km(lat, lon, owner_lat, owner_lon)
+        if distance <= radius_km:
+            hits.append((pk, distance))
+    hits.sort(key=lambda hit: hit[1])
+    return hits[:limit] if limit else hits
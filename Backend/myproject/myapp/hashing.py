@@ -0,0 +1,51 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hash_workers():
+    return getattr(settings, "AUTH_HASH_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+def get_pool():
+    """
+    Bounded pool for password hashing off the event loop. Threads are
+    enough: hashlib's PBKDF2 releases the GIL, so the hashes run in
+    parallel without the pickling cost of a process pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=hash_workers(), thread_name_prefix="auth-hash")
+    return _pool
+
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_pool(), fn, *args)
+
+
+async def amake_password(raw):
+    return await _run(make_password, raw)
+
+
+def _verify(raw, encoded):
+    stale = []
+    valid = check_password(raw, encoded, setter=lambda _: stale.append(True))
+    return valid, bool(stale)
+
+
+async def acheck_password(raw, encoded):
+    """
+    (valid, new_hash). new_hash is set when the stored hash uses an old
+    algorithm or iteration count, as User.check_password would re-save it.
+    """
+    valid, stale = await _run(_verify, raw, encoded)
+    return valid, (await amake_password(raw) if stale else None)
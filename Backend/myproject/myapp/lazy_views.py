@@ -0,0 +1,60 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """
+    URLconf callback that imports its view module on the first request to
+    the route instead of when the URLconf loads. Attributes the handler and
+    middleware read per request (csrf_exempt, query_budget, ...) come from
+    the real view; the ones the resolver reads while indexing routes
+    (view_class, __name__, __module__, __qualname__) are answered from the
+    dotted path, so building the resolver imports nothing.
+
+    Django decides sync vs async from the callback before calling it, so
+    async views must be declared with is_async=True; a mismatch is raised
+    when the view is first loaded.
+    """
+
+    def __init__(self, dotted_path, is_async=False):
+        module, name = dotted_path.rsplit(".", 1)
+        self.dotted_path = dotted_path
+        self.is_async = is_async
+        self.__module__, self.__name__, self.__qualname__ = module, name, name
+        self._view = None
+        if is_async:
+            markcoroutinefunction(self)
+
+    @property
+    def view(self):
+        if self._view is None:
+            view = import_string(self.dotted_path)
+            if iscoroutinefunction(view) != self.is_async:
+                kind = "an async" if self.is_async else "a sync"
+                raise ImproperlyConfigured(f"{self.dotted_path} is routed as {kind} view but is not one.")
+            self._view = view
+        return self._view
+
+    @property
+    def loaded(self):
+        return self._view is not None
+
+    def __call__(self, request, *args, **kwargs):
+        # for async views this returns the coroutine, which the handler awaits
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "view_class":
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    def __repr__(self):
+        return f"<LazyView {self.dotted_path}{' (loaded)' if self.loaded else ''}>"
+
+
+def lazy_views(module):
+    """lazy_views("myapp.view.auth_views")("login_admin") -> LazyView"""
+    def view(name, is_async=False):
+        return LazyView(f"{module}.{name}", is_async=is_async)
+    return view
@@ -0,0 +1,184 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Sum
+
+from .admin_stats import OWNER_LOCATION
+from .models import Owner, StatCounter
+from .search import TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_QUERY_LENGTH = 100
+# prefixes this short match a large share of the locations, so their
+# results are kept until the next change instead of rescanned per keystroke
+MEMO_PREFIX_LENGTH = 2
+
+
+def normalize(text):
+    return " ".join(TOKEN_RE.findall((text or "").lower()))
+
+
+def index_entries(location):
+    """
+    "Upper West Side" -> ("upper west side", .., True), ("west side", .., False),
+    ("side", .., False): a prefix of any of the keys matches; the flag
+    marks the key the whole name starts with.
+    """
+    words = TOKEN_RE.findall((location or "").lower())
+    return [(" ".join(words[i:]), location, i == 0) for i in range(len(words))]
+
+
+# INDEX
+class LocationIndex:
+    """
+    Distinct Owner.location values with how many owners have each, kept
+    as a sorted array with one key per word start of each location. A
+    lookup is a bisect to the first key with the prefix and a scan over
+    the matches, so it never touches the database. Counts change in
+    place; the array only changes when a location appears or disappears.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.keys = []  # sorted (key, location, starts the name)
+        self.memo = {}  # (prefix, limit) -> results, for short prefixes
+        self.checked_at = None  # time.monotonic() of the last load
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _add(self, location):
+        for entry in index_entries(location):
+            insort(self.keys, entry)
+
+    def _remove(self, location):
+        for entry in index_entries(location):
+            i = bisect_left(self.keys, entry)
+            if i < len(self.keys) and self.keys[i] == entry:
+                del self.keys[i]
+
+    def load(self, counts):
+        """Replace everything; counts: {location: owners}."""
+        counts = {location: n for location, n in counts.items() if n > 0 and normalize(location)}
+        keys = sorted(entry for location in counts for entry in index_entries(location))
+        with self._lock:
+            self.counts, self.keys, self.memo = counts, keys, {}
+
+    def apply(self, changes):
+        """changes: {location: +n / -n}."""
+        with self._lock:
+            self.memo = {}
+            for location, n in changes.items():
+                if not normalize(location):
+                    continue
+                before = self.counts.get(location, 0)
+                after = before + n
+                if after > 0:
+                    self.counts[location] = after
+                    if before <= 0:
+                        self._add(location)
+                elif before > 0:
+                    del self.counts[location]
+                    self._remove(location)
+
+    def lookup(self, prefix, limit=DEFAULT_LIMIT):
+        """
+        [(location, owners)] whose name, or a word in it, starts with
+        prefix. Names that start with it come first, then by owner count.
+        """
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        memo_key = (prefix, limit) if len(prefix) <= MEMO_PREFIX_LENGTH else None
+        with self._lock:
+            if memo_key in self.memo:
+                return self.memo[memo_key]
+            keys, matches = self.keys, {}
+            i = bisect_left(keys, (prefix,))
+            while i < len(keys) and keys[i][0].startswith(prefix):
+                _, location, leading = keys[i]
+                matches[location] = matches.get(location, False) or leading
+                i += 1
+            best = heapq.nsmallest(
+                limit, matches.items(), key=lambda m: (not m[1], -self.counts[m[0]], m[0].lower()),
+            )
+            results = [(location, self.counts[location]) for location, _ in best]
+            if memo_key is not None:
+                self.memo[memo_key] = results
+            return results
+
+
+index = LocationIndex()
+
+
+def _sync_seconds():
+    return getattr(settings, "LOCATION_INDEX_SYNC_SECONDS", 60)
+
+
+def location_counts():
+    """
+    {location: owners}, from the owner_location stat counters (one row per
+    distinct location) when they account for every owner. Until
+    rebuild_admin_stats has been run they only cover owners saved since
+    the counters were added, so Owner is grouped by location instead.
+    """
+    counters = StatCounter.objects.filter(kind=OWNER_LOCATION, count__gt=0)
+    counted = counters.aggregate(n=Sum("count"))["n"] or 0
+    owners = Owner.objects.count()
+    if counted == owners:
+        return dict(counters.values_list("key", "count"))
+    logger.warning(
+        "owner_location counters cover %s of %s owners; grouping Owner instead. Run rebuild_admin_stats.",
+        counted, owners,
+    )
+    return dict(Owner.objects.order_by().values_list("location").annotate(n=Count("id")))
+
+
+def ensure_fresh(force=False):
+    """
+    Load the index if warm() has not, then reload it at most once every
+    LOCATION_INDEX_SYNC_SECONDS. Saves in this process are applied as
+    they commit; the reload picks up other workers and anything that
+    bypassed the signals.
+    """
+    now = time.monotonic()
+    if not force and index.checked_at is not None and now - index.checked_at < _sync_seconds():
+        return
+    index.checked_at = now
+    index.load(location_counts())
+
+
+def warm():
+    """
+    Load the index before the first request. Called from wsgi.py and
+    asgi.py, so serving processes start warm while migrate, tests and
+    other management commands never touch the table. A database that is
+    not ready yet only leaves the index to load on first use.
+    """
+    try:
+        ensure_fresh(force=True)
+    except DatabaseError as exc:
+        index.checked_at = None
+        logger.warning("location index not warmed: %s", exc)
+
+
+def counters_changed(deltas):
+    """The admin_stats deltas of one Owner save/delete; applied to the index on commit."""
+    changes = {key: n for (kind, key), n in deltas.items() if kind == OWNER_LOCATION and n and key is not None}
+    if changes and index.checked_at is not None:  # nothing to patch before the first load
+        transaction.on_commit(partial(index.apply, changes))
+
+
+def suggest(prefix, limit=DEFAULT_LIMIT):
+    ensure_fresh()
+    return index.lookup(prefix, limit)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from myapp import benchmark
+from myapp.hashing import hash_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent logins with the real password hasher: the sync DRF view through "
+        "the WSGI handler on a thread pool, against the async view through the ASGI "
+        "handler on one event loop with hashing in the auth hash pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=32)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Benchmarks run offline against SQLite; set DB_ENGINE=sqlite.")
+
+        with benchmark.bench_database():
+            benchmark.seed(options["users"], 0, 0)
+            ctx = benchmark.Context(run_id=os.getpid())
+            n, concurrency = options["requests"], options["concurrency"]
+            self.stdout.write(f"{n} logins, {concurrency} in flight, {hash_workers()} hash workers")
+
+            self.report("WSGI  login-user/", *self.run_wsgi(ctx, n, concurrency))
+            self.report("ASGI  login-user-async/", *asyncio.run(self.run_asgi(ctx, n, concurrency)))
+
+    def report(self, label, wall, statuses, n):
+        self.stdout.write(f"  {label:<26}{n / wall:8.1f} logins/s  {wall:7.2f}s  {dict(statuses)}")
+
+    def run_wsgi(self, ctx, n, concurrency):
+        client = Client()
+
+        def login(i):
+            return client.post("/api/login-user/", benchmark._login(ctx, i), content_type="application/json").status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = Counter(pool.map(login, range(n)))
+        return time.perf_counter() - started, statuses, n
+
+    async def run_asgi(self, ctx, n, concurrency):
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def login(i):
+            async with gate:
+                response = await client.post("/api/login-user-async/", benchmark._login(ctx, i), content_type="application/json")
+                return response.status_code
+
+        started = time.perf_counter()
+        statuses = Counter(await asyncio.gather(*(login(i) for i in range(n))))
+        return time.perf_counter() - started, statuses, n
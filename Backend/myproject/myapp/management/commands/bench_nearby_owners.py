@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.geo import encode_geohash, haversine_km, owners_within_radius
+from myapp.models import Owner
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N owners around a centre point and compare geohash radius queries "
+        "against a brute-force scan. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owners", type=int, nargs="+", default=[100_000, 1_000_000])
+        parser.add_argument("--radius-km", type=float, default=2.0)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--spread", type=float, default=2.0, help="degrees around the centre")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        for n in options["owners"]:
+            try:
+                with transaction.atomic():
+                    self.run(n, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def run(self, n, options):
+        rng = random.Random(options["seed"])
+        centre_lat, centre_lon, spread = 27.7, 85.3, options["spread"]
+
+        started = time.perf_counter()
+        batch = []
+        for _ in range(n):
+            lat = centre_lat + rng.uniform(-spread, spread)
+            lon = centre_lon + rng.uniform(-spread, spread)
+            batch.append(Owner(
+                address="bench", phone="0", location="bench",
+                latitude=lat, longitude=lon, geohash=encode_geohash(lat, lon),
+            ))
+            if len(batch) == 5000:
+                Owner.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Owner.objects.bulk_create(batch)
+        self.stdout.write(f"\n{n} owners seeded in {time.perf_counter() - started:.1f}s")
+
+        points = [
+            (centre_lat + rng.uniform(-spread, spread), centre_lon + rng.uniform(-spread, spread))
+            for _ in range(options["queries"])
+        ]
+        radius = options["radius_km"]
+
+        started = time.perf_counter()
+        indexed_hits = 0
+        for lat, lon in points:
+            indexed_hits += len(owners_within_radius(Owner.objects.all(), lat, lon, radius))
+        indexed = (time.perf_counter() - started) / len(points)
+
+        started = time.perf_counter()
+        brute_hits = 0
+        for lat, lon in points:
+            for olat, olon in Owner.objects.values_list("latitude", "longitude").iterator(chunk_size=10_000):
+                if haversine_km(lat, lon, olat, olon) <= radius:
+                    brute_hits += 1
+        brute = (time.perf_counter() - started) / len(points)
+
+        if indexed_hits != brute_hits:
+            self.stderr.write(f"hit mismatch: geohash={indexed_hits} brute={brute_hits}")
+        self.stdout.write(f"  geohash index: {indexed * 1000:9.2f} ms/query ({indexed_hits} hits)")
+        self.stdout.write(f"  brute force  : {brute * 1000:9.2f} ms/query ({brute_hits} hits)")
+        self.stdout.write(f"  speedup      : {brute / indexed:9.1f}x")
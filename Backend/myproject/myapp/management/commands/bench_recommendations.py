@@ -0,0 +1,99 @@
+import math
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.geo import haversine_km
+from myapp.recommendations import (
+    DISTANCE_SCALE_KM, DISTANCE_WEIGHT, FRESHNESS_DAYS, FRESHNESS_SECONDS, FRESHNESS_WEIGHT, TEXT_WEIGHT,
+    OwnerMatrix, text_vector,
+)
+
+LOCATIONS = ["Kathmandu", "Lalitpur", "Bhaktapur", "Pokhara", "Butwal", "Biratnagar", "Dharan", "Chitwan"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an in-memory owner recommendation matrix with synthetic owners "
+        "(no database) and time vectorized top-k against a pure Python loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owners", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--python-sample", type=int, default=50_000,
+                            help="owners scored by the pure Python loop; its time is scaled to --owners")
+
+    def handle(self, *args, **options):
+        rng = random.Random(17)
+        n = options["owners"]
+        now = timezone.now()
+
+        def rows():
+            for i in range(n):
+                city = rng.choice(LOCATIONS)
+                yield (
+                    i + 1, f"{city} Ward {rng.randint(1, 30)}", f"{rng.randint(1, 999)} {rng.choice(LOCATIONS)} Marg",
+                    27.7 + rng.uniform(-1, 1), 85.3 + rng.uniform(-1, 1),
+                    now - timedelta(days=rng.uniform(0, 365)),
+                )
+
+        matrix = OwnerMatrix()
+        started = time.perf_counter()
+        matrix.upsert_rows(rows())
+        self.stdout.write(
+            f"{n} owners loaded in {time.perf_counter() - started:.1f}s "
+            f"(features {matrix.features.nbytes / 2**20:.0f} MiB)"
+        )
+
+        queries = [
+            (text_vector(f"{rng.choice(LOCATIONS)} Ward {rng.randint(1, 30)}", ""),
+             27.7 + rng.uniform(-1, 1), 85.3 + rng.uniform(-1, 1))
+            for _ in range(options["queries"])
+        ]
+        k = options["k"]
+
+        timings = []
+        for query, lat, lon in queries:
+            started = time.perf_counter()
+            matrix.top_k(query, k, lat, lon)
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(f"  numpy argpartition : median {statistics.median(timings):8.2f} ms  max {max(timings):8.2f} ms")
+
+        # same score, one owner at a time, then a full sort
+        sample = min(options["python_sample"], matrix.size)
+        features = matrix.features[:sample].tolist()
+        lats = [math.degrees(v) for v in matrix.lats[:sample].tolist()]
+        lons = [math.degrees(v) for v in matrix.lons[:sample].tolist()]
+        updated = [matrix.epoch + math.log(v) * FRESHNESS_SECONDS for v in matrix.freshness[:sample].tolist()]
+        query, lat, lon = queries[0]
+        query = query.tolist()
+        clock = time.time()
+
+        started = time.perf_counter()
+        scored = []
+        for i in range(sample):
+            score = TEXT_WEIGHT * sum(a * b for a, b in zip(features[i], query))
+            score += DISTANCE_WEIGHT * math.exp(-haversine_km(lat, lon, lats[i], lons[i]) / DISTANCE_SCALE_KM)
+            score += FRESHNESS_WEIGHT * math.exp(-max(clock - updated[i], 0) / 86400.0 / FRESHNESS_DAYS)
+            scored.append((score, i))
+        scored.sort(reverse=True)
+        python_ms = (time.perf_counter() - started) * 1000 * matrix.size / sample
+        self.stdout.write(f"  python loop + sort : ~{python_ms:8.0f} ms (scaled from {sample} owners)")
+
+        # both paths must agree on the winners of the sampled rows
+        small = OwnerMatrix()
+        small.upsert_rows(
+            (int(matrix.ids[i]), "", "", lats[i], lons[i], datetime.fromtimestamp(updated[i], tz=dt_timezone.utc))
+            for i in range(sample)
+        )
+        small.features[:sample] = matrix.features[:sample]
+        expected = [int(matrix.ids[i]) for _, i in scored[:k]]
+        got = [pk for pk, _ in small.top_k(queries[0][0], k, lat, lon, now=clock)]
+        if got != expected:
+            self.stderr.write(f"top-k mismatch: numpy={got} python={expected}")
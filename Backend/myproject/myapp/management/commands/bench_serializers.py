@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp.fast_serializers import owner_fast, tenant_fast, user_fast
+from myapp.geo import encode_geohash
+from myapp.models import Owner, Tenant, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF ModelSerializer(many=True) against the compiled values_list() "
+        "serializers on large lists. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                for label, model, fast in (
+                    ("users", User, user_fast),
+                    ("owners", Owner, owner_fast),
+                    ("tenants", Tenant, tenant_fast),
+                ):
+                    self.compare(label, model.objects.order_by("-id"), fast, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            (User(username=f"serbench-{i}", password="!", role="owner", phone=str(i)) for i in range(rows)),
+            batch_size=5000,
+        )
+        Owner.objects.bulk_create(
+            (
+                Owner(address=f"{i} Marg", phone=str(i), location="Kathmandu",
+                      latitude=27.7, longitude=85.3, geohash=encode_geohash(27.7, 85.3))
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        Tenant.objects.bulk_create(
+            (Tenant(address=f"{i} Marg", phone=str(i), location="Lalitpur") for i in range(rows)),
+            batch_size=5000,
+        )
+        self.stdout.write(f"seeded {rows} rows per table in {time.perf_counter() - started:.1f}s")
+
+    def best_of(self, repeat, fn):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def compare(self, label, queryset, fast, repeat):
+        drf_time, expected = self.best_of(repeat, lambda: fast.serializer_class(queryset, many=True).data)
+        fast_time, actual = self.best_of(repeat, lambda: fast.serialize(queryset))
+
+        if [dict(row) for row in expected] != actual:
+            raise CommandError(f"{label}: compiled serializer output differs from {fast.serializer_class.__name__}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{label} ({len(actual)} rows)"))
+        self.stdout.write(f"  {fast.serializer_class.__name__:<18}{drf_time * 1000:10.1f} ms")
+        self.stdout.write(f"  {'compiled':<18}{fast_time * 1000:10.1f} ms")
+        self.stdout.write(f"  speedup           {drf_time / fast_time:10.1f}x")
@@ -0,0 +1,140 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.http import QueryDict
+
+from myapp.geo import encode_geohash, owners_in_bbox
+from myapp.models import Owner, Tenant, User
+from myapp.pagination import DEFAULT_PAGE_SIZE
+from myapp.search import rebuild_index, ranked_postings
+from myapp.user_filters import filter_users
+from myapp.view.auth_views import USER_LIST_FIELDS
+
+# one query string per entry in user_filters.INDEXED_PLANS, plus range/descending variants
+USER_FILTERS = [
+    "created_after=2020-01-01&created_before=2100-01-01",
+    "role=owner&sort=-created_at",
+    "phone=9800000042",
+    "username_prefix=explain-42",
+    "role=tenant&username_prefix=explain-1&sort=-username",
+    "email_prefix=explain-4",
+    "role=owner&email_prefix=explain-3",
+]
+
+LOCATIONS = ["Kathmandu", "Lalitpur", "Bhaktapur", "Pokhara", "Butwal", "Biratnagar", "Dharan", "Chitwan"]
+ROLES = ["owner", "tenant"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users/owners/tenants, then print EXPLAIN output and timings for every "
+        "list query behind myapp/urls.py. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50_000)
+        parser.add_argument("--owners", type=int, default=20_000)
+        parser.add_argument("--tenants", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--no-explain", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                for name, build in self.queries():
+                    self.report(name, build, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    # SEED
+    def seed(self, options):
+        rng = random.Random(7)
+        started = time.perf_counter()
+
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"explain-{i}",
+                    password="!",
+                    role=ROLES[i % 2],
+                    phone=f"98{i:08d}",
+                    email=f"explain-{i}@example.com",
+                )
+                for i in range(options["users"])
+            ),
+            batch_size=5000,
+        )
+
+        owners = []
+        for i in range(options["owners"]):
+            lat, lon = 27.7 + rng.uniform(-1, 1), 85.3 + rng.uniform(-1, 1)
+            owners.append(Owner(
+                address=f"{rng.randint(1, 999)} {rng.choice(LOCATIONS)} Road",
+                phone=f"97{i:08d}",
+                location=f"{rng.choice(LOCATIONS)} Ward {rng.randint(1, 30)}",
+                latitude=lat, longitude=lon, geohash=encode_geohash(lat, lon),
+            ))
+        Owner.objects.bulk_create(owners, batch_size=5000)
+        rebuild_index()
+
+        Tenant.objects.bulk_create(
+            (
+                Tenant(address="seed", phone=f"96{i:08d}", location=rng.choice(LOCATIONS))
+                for i in range(options["tenants"])
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"seeded in {time.perf_counter() - started:.1f}s\n")
+
+    # QUERIES (kept in step with the views)
+    def queries(self):
+        page = DEFAULT_PAGE_SIZE + 1
+        users = User.objects.order_by("created_at", "id")
+        middle = users.values("created_at", "id")[users.count() // 2]
+        after_middle = Q(created_at__gt=middle["created_at"]) | Q(created_at=middle["created_at"], id__gt=middle["id"])
+
+        return [
+            *((f"list-users/?{qs}", self.filtered_users(qs, page)) for qs in USER_FILTERS),
+            ("list-users/ first page", lambda: users.values(*USER_LIST_FIELDS)[:page]),
+            ("list-users/ deep cursor", lambda: users.filter(after_middle).values(*USER_LIST_FIELDS)[:page]),
+            ("list-owners/ first page", lambda: users.filter(role="owner").values(*USER_LIST_FIELDS)[:page]),
+            ("list-tenants/ deep cursor", lambda: users.filter(after_middle, role="tenant").values(*USER_LIST_FIELDS)[:page]),
+            ("all-owners/", lambda: Owner.objects.order_by("-id")),
+            ("all-tenants/", lambda: Tenant.objects.order_by("-id")),
+            ("owners by location", lambda: Owner.objects.filter(location="Pokhara Ward 3")),
+            ("owners by phone", lambda: Owner.objects.filter(phone="9700000042")),
+            ("tenants by phone", lambda: Tenant.objects.filter(phone="9600000042")),
+            ("search-owners/?q=pokhara war", lambda: ranked_postings("pokhara war")[:page]),
+            ("nearby-owners/ 2km box", lambda: owners_in_bbox(Owner.objects.all(), 27.68, 85.28, 27.72, 85.32)),
+        ]
+
+    def filtered_users(self, query_string, page):
+        queryset, order = filter_users(User.objects.all(), QueryDict(query_string))
+        return lambda: queryset.order_by(*order.order_by()).values(*USER_LIST_FIELDS)[:page]
+
+    # REPORT
+    def report(self, name, build, options):
+        timings = []
+        rows = 0
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            rows = len(list(build()))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f"  rows={rows}  median={statistics.median(timings):.2f}ms  max={max(timings):.2f}ms"
+        )
+        if not options["no_explain"]:
+            for line in build().explain().splitlines():
+                self.stdout.write(f"  | {line}")
@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test.utils import override_settings
+from django.urls import path
+
+PHASE_MARK = "@phase "
+
+# Run in a fresh interpreter under -X importtime. Phase marks go to stderr
+# between the import lines so each import can be charged to a phase.
+BOOT_SCRIPT = """
+import io, json, sys, time
+def mark(name):
+    sys.stderr.write("%(mark)s" + name + "\\n"); sys.stderr.flush()
+phases = {}
+started = time.perf_counter()
+mark("setup")
+import django
+django.setup(set_prefix=False)
+phases["setup"] = time.perf_counter()
+mark("middleware")
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+phases["middleware"] = time.perf_counter()
+mark("urlconf")
+from django.urls import get_resolver
+get_resolver()._populate()
+phases["urlconf"] = time.perf_counter()
+mark("first request")
+environ = json.loads(sys.argv[1])
+environ["wsgi.input"] = io.BytesIO(b"")
+environ["wsgi.errors"] = sys.stderr
+response = handler(environ, lambda status, headers: None)
+response.close()
+phases["first request"] = time.perf_counter()
+last, out = started, {}
+for name, stamp in phases.items():
+    out[name] = (stamp - last) * 1000
+    last = stamp
+print(json.dumps({"phases": out, "status": response.status_code}))
+""" % {"mark": PHASE_MARK}
+
+
+def ping(request):
+    return HttpResponse(b"ok")
+
+
+# URLconf used while timing the middleware, so the view itself costs nothing
+urlpatterns = [path("ping/", ping, name="ping")]
+
+
+def wsgi_environ(path, host, method="GET"):
+    return {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "HTTP_HOST": host,
+        "REMOTE_ADDR": "127.0.0.1",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.url_scheme": "http",
+    }
+
+
+def parse_importtime(lines):
+    """[(phase, module, self_us, cumulative_us, depth)] from -X importtime stderr."""
+    phase, rows = "interpreter", []
+    for line in lines:
+        if line.startswith(PHASE_MARK):
+            phase = line[len(PHASE_MARK):].strip()
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative, name = [part for part in line.replace("import time:", "|", 1).split("|")]
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((phase, name.strip(), int(self_us), int(cumulative), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Where worker boot time goes: a cold interpreter is started under -X importtime "
+        "and timed through django.setup(), middleware loading, URLconf loading and a "
+        "first request, with imports charged to each phase. Then times the per-request "
+        "cost of each MIDDLEWARE entry against a view that does nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/login/", help="path of the first request in the cold run")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+        parser.add_argument("--requests", type=int, default=2000, help="requests per middleware timing")
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--skip-imports", action="store_true")
+        parser.add_argument("--skip-middleware", action="store_true")
+
+    def handle(self, *args, **options):
+        if not options["skip_imports"]:
+            self.report_boot(options)
+        if not options["skip_middleware"]:
+            self.report_middleware(options)
+
+    # COLD BOOT
+    def report_boot(self, options):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get("PYTHONPATH")]))
+        env.setdefault("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)
+        environ = wsgi_environ(options["path"], options["host"])
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT, json.dumps(environ)],
+            capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR),
+        )
+        if proc.returncode:
+            raise CommandError(f"cold boot failed:\n{proc.stderr[-2000:]}")
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(proc.stderr.splitlines())
+
+        self.stdout.write(f"Cold boot  (first request: GET {options['path']} -> {result['status']})")
+        by_phase = defaultdict(int)
+        for phase, _, self_us, _, _ in rows:
+            by_phase[phase] += self_us
+        self.stdout.write(f"  {'phase':<16}{'wall ms':>10}{'imports ms':>12}")
+        for phase, wall in result["phases"].items():
+            self.stdout.write(f"  {phase:<16}{wall:10.1f}{by_phase[phase] / 1000:12.1f}")
+        self.stdout.write(f"  {'total':<16}{sum(result['phases'].values()):10.1f}")
+
+        packages = Counter()
+        for _, name, self_us, _, _ in rows:
+            packages[name.split(".")[0]] += self_us
+        self.stdout.write("\n  Import self time by top-level package")
+        for package, us in packages.most_common(options["top"]):
+            self.stdout.write(f"    {package:<34}{us / 1000:8.1f} ms")
+
+        # imports nobody above them asked for, i.e. what each phase itself pulled in
+        roots = sorted((r for r in rows if r[4] == 0), key=lambda r: -r[3])
+        self.stdout.write("\n  Slowest imports (cumulative, outermost only)")
+        for phase, name, _, cumulative, _ in roots[:options["top"]]:
+            self.stdout.write(f"    {name:<40}{cumulative / 1000:8.1f} ms  [{phase}]")
+
+    # MIDDLEWARE
+    def stack_timer(self, middleware, options):
+        with override_settings(MIDDLEWARE=middleware, ROOT_URLCONF=__name__):
+            handler = WSGIHandler()
+        environ = wsgi_environ("/ping/", options["host"])
+
+        def call():
+            env = dict(environ, **{"wsgi.input": io.BytesIO(b""), "wsgi.errors": sys.stderr})
+            response = handler(env, lambda status, headers: None)
+            response.close()
+            return response.status_code
+
+        def timed(n):
+            started = time.perf_counter()
+            for _ in range(n):
+                call()
+            return (time.perf_counter() - started) / n * 1e6
+
+        with override_settings(ROOT_URLCONF=__name__):
+            status = call()
+        if status != 200:
+            raise CommandError(f"/ping/ returned {status} with MIDDLEWARE={middleware}")
+        return timed
+
+    def report_middleware(self, options):
+        middleware = list(settings.MIDDLEWARE)
+        duplicates = [name for name, n in Counter(middleware).items() if n > 1]
+
+        # each entry is costed as stack[:i + 1] minus stack[:i], so entries
+        # that need an earlier one (auth after sessions) still work. Every
+        # round times all the stacks back to back; the median difference
+        # across rounds is reported, which keeps scheduler noise out of it
+        timers = [self.stack_timer(middleware[:i], options) for i in range(len(middleware) + 1)]
+        rounds = []
+        with override_settings(ROOT_URLCONF=__name__):
+            for timer in timers:
+                timer(min(200, options["requests"]))
+            for _ in range(options["rounds"]):
+                rounds.append([timer(options["requests"]) for timer in timers])
+
+        bare = statistics.median(r[0] for r in rounds)
+        full = statistics.median(r[-1] for r in rounds)
+        self.stdout.write(f"\nMiddleware per request  (median of {options['rounds']} x {options['requests']} requests)")
+        self.stdout.write(f"  no middleware {bare:9.1f} us")
+        self.stdout.write(f"  full stack    {full:9.1f} us  (+{full - bare:.1f} us for {len(middleware)} entries)")
+        for i, name in enumerate(middleware):
+            cost = statistics.median(r[i + 1] - r[i] for r in rounds)
+            self.stdout.write(f"    {name:<56}{cost:8.1f} us")
+        if duplicates:
+            self.stderr.write(f"  listed more than once in MIDDLEWARE: {', '.join(duplicates)}")
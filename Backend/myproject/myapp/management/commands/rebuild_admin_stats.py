@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from myapp.admin_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the admin stats counters (role counts, signups per day, owners per "
+        "location) from the user and owner tables. Run once to backfill, and after "
+        "loaddata or raw SQL that bypasses the model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} counters"))
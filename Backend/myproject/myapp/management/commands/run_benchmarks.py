@@ -0,0 +1,103 @@
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp import benchmark
+from myapp.urls import urlpatterns
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway SQLite database and drive every route in myapp/urls.py "
+        "concurrently. Reports p50/p95/p99 latency and throughput, and fails when "
+        "results regress against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--owners", type=int, default=1000)
+        parser.add_argument("--tenants", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--only", nargs="*", help="run only scenarios whose name contains one of these")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+        parser.add_argument("--update-baseline", action="store_true")
+        parser.add_argument(
+            "--no-baseline", action="store_true",
+            help="just report; without it a missing baseline or scenario is an error",
+        )
+        parser.add_argument("--json", dest="json_out", help="also write the results to this file")
+        parser.add_argument(
+            "--fast-hasher", action="store_true",
+            help="hash with MD5 so auth routes measure the app, not PBKDF2",
+        )
+        parser.add_argument(
+            "--login-throttle", action="store_true",
+            help="keep the login token buckets on; every request comes from one IP, so most logins get 429",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Benchmarks run offline against SQLite; set DB_ENGINE=sqlite.")
+
+        uncovered = benchmark.uncovered_routes(p.name for p in urlpatterns)
+        if uncovered:
+            raise CommandError(f"Routes without a benchmark scenario: {', '.join(uncovered)}")
+
+        with benchmark.bench_database(options["fast_hasher"], options["login_throttle"]):
+            benchmark.seed(options["users"], options["owners"], options["tenants"])
+            results = self.run(options)
+
+        if options["json_out"]:
+            Path(options["json_out"]).write_text(json.dumps(results, indent=2))
+        self.check_baseline(results, options)
+
+    def run(self, options):
+        ctx = benchmark.Context(run_id=os.getpid())
+        results = {}
+        self.stdout.write(f"{'scenario':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'err':>7}  statuses")
+        for scenario in benchmark.SCENARIOS:
+            name = scenario[0]
+            if options["only"] and not any(part in name for part in options["only"]):
+                continue
+            row = benchmark.run_scenario(ctx, scenario, options["requests"], options["concurrency"])
+            results[name] = row
+            self.stdout.write(
+                f"{name:<28}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+                f"{row['throughput_rps']:>9.1f}{row['error_rate']:>7.1%}  {row['statuses']}"
+            )
+        return results
+
+    def check_baseline(self, results, options):
+        path = Path(options["baseline"])
+        if options["update_baseline"]:
+            # merged, so an --only run updates just the scenarios it ran
+            baseline = json.loads(path.read_text()) if path.exists() else {}
+            baseline.update(results)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}"))
+            return
+
+        if options["no_baseline"]:
+            return
+        if not path.exists():
+            raise CommandError(f"No baseline at {path}; run with --update-baseline to create one.")
+
+        baseline = json.loads(path.read_text())
+        missing = [name for name in results if name not in baseline]
+        if missing:
+            raise CommandError(
+                f"No baseline for {', '.join(missing)}; run them with --update-baseline to add them."
+            )
+        regressions = benchmark.compare(results, baseline, options["tolerance"])
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_alter_owner_phone_alter_tenant_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='myapp.owner')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'owner'), name='uniq_owner_search_token')],
+            },
+        ),
+    ]
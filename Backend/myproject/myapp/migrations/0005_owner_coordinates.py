@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_owner_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='owner',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='owner',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='owner',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_owner_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='owner',
+            index=models.Index(fields=['location'], name='owner_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=models.Index(fields=['phone'], name='owner_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['location'], name='tenant_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['phone'], name='tenant_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'created_at', 'id'], name='user_role_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_user_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='owner',
+            index=models.Index(fields=['updated_at'], name='owner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_profile_user_link'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=32)),
+                ('key', models.CharField(max_length=200)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', '-count', 'key'], name='stat_kind_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='uniq_stat_counter')],
+            },
+        ),
+    ]
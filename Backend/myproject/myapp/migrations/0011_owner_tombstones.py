@@ -0,0 +1,24 @@
+# Generated by Django 5.0 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_stat_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at'], name='owner_tombstone_deleted_idx')],
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from decimal import Decimal
 
+from .geo import encode_geohash
+
 
 # Create your models here.
 class User(AbstractUser):
@@ -17,24 +19,128 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # keyset pages of list_all_users: ORDER BY created_at, id
+            models.Index(fields=["created_at", "id"], name="user_created_id_idx"),
+            # list_owners / list_tenants: WHERE role = ? ORDER BY created_at, id
+            models.Index(fields=["role", "created_at", "id"], name="user_role_created_id_idx"),
+            # admin list filters, see user_filters.INDEXED_PLANS
+            models.Index(fields=["phone", "created_at", "id"], name="user_phone_created_id_idx"),
+            models.Index(fields=["role", "username"], name="user_role_username_idx"),
+            models.Index(fields=["email", "id"], name="user_email_id_idx"),
+            models.Index(fields=["role", "email", "id"], name="user_role_email_id_idx"),
+        ]
+
 
 class Owner(models.Model):
+    # nullable: rows from before the link, bulk imports and seeds have no login
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name="owner_profile",
+    )
     address = models.CharField(max_length=100)
     phone = models.CharField(max_length=30)  # ✅ change
     location = models.CharField(max_length=200)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["location"], name="owner_location_idx"),
+            models.Index(fields=["phone"], name="owner_phone_idx"),
+            # recommendation matrix catch-up: WHERE updated_at >= ?
+            models.Index(fields=["updated_at"], name="owner_updated_idx"),
+        ]
+
     def __str__(self):
         return f"Owner {self.id}"
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        super().save(*args, **kwargs)
     
     
 class Tenant(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name="tenant_profile",
+    )
     address = models.CharField(max_length=100)
     phone = models.CharField(max_length=30)  # ✅ change
     location = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["location"], name="tenant_location_idx"),
+            models.Index(fields=["phone"], name="tenant_phone_idx"),
+        ]
+
+    def __str__(self):
+        return f"Tenant {self.id}"
+
+
+class OwnerSearchToken(models.Model):
+    owner = models.ForeignKey(Owner, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["token", "owner"], name="uniq_owner_search_token"),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> Owner {self.owner_id}"
+
+
+class StatCounter(models.Model):
+    """
+    Running count behind the admin stats endpoint, one row per (kind, key),
+    e.g. ("role", "owner") or ("signup_day", "2026-10-18"). Kept current
+    by signals (see admin_stats); rebuild_admin_stats recomputes them.
+    """
+    kind = models.CharField(max_length=32)
+    key = models.CharField(max_length=200)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # also serves kind = ? AND key >= ? for the signups window
+            models.UniqueConstraint(fields=["kind", "key"], name="uniq_stat_counter"),
+        ]
+        indexes = [
+            # top owner locations: WHERE kind = ? ORDER BY count DESC, key
+            models.Index(fields=["kind", "-count", "key"], name="stat_kind_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} = {self.count}"
+
+
+class OwnerTombstone(models.Model):
+    """
+    One row per deleted owner, so the recommendation matrix of every worker
+    can drop it without rescanning the owner table (see tombstones).
+    Pruned after RECOMMEND_TOMBSTONE_DAYS.
+    """
+    owner_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # matrix catch-up: WHERE deleted_at >= ?; pruning: WHERE deleted_at < ?
+            models.Index(fields=["deleted_at"], name="owner_tombstone_deleted_idx"),
+        ]
+
     def __str__(self):
-        return f"Tenant {self.id}"
\ No newline at end of file
+        return f"Owner {self.owner_id} deleted"
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .streaming import keep_context
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_totals = {}
+_recorder = ContextVar("query_recorder", default=None)
+
+
+def query_budget(max_queries):
+    """Declare how many SQL queries one request to this view may run."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class _Recorder:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. It counts into the
+    recorder of the current request's context, which sync_to_async copies
+    into its threads, so async ORM queries are counted too.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def record(name, queries, db_time, total_time):
+    with _lock:
+        row = _totals.setdefault(name, {"requests": 0, "queries": 0, "db_ms": 0.0, "total_ms": 0.0, "max_queries": 0})
+        row["requests"] += 1
+        row["queries"] += queries
+        row["db_ms"] += db_time * 1000
+        row["total_ms"] += total_time * 1000
+        row["max_queries"] = max(row["max_queries"], queries)
+
+
+def snapshot():
+    with _lock:
+        return {
+            name: {
+                "requests": row["requests"],
+                "avg_queries": round(row["queries"] / row["requests"], 2),
+                "max_queries": row["max_queries"],
+                "avg_db_ms": round(row["db_ms"] / row["requests"], 3),
+                "avg_total_ms": round(row["total_ms"] / row["requests"], 3),
+            }
+            for name, row in _totals.items()
+        }
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+# MIDDLEWARE
+class QueryMetricsMiddleware:
+    """
+    Counts SQL queries and DB time per request and aggregates them per URL
+    name. With DEBUG (or QUERY_METRICS_HEADERS) on, the numbers are also
+    sent back as X-DB-Queries / X-DB-Time-ms / X-Total-Time-ms headers, and
+    a request over its view's query_budget is logged as a warning.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, "QUERY_METRICS_HEADERS", settings.DEBUG)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install(connection)
+        recorder = _Recorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        # the async ORM connects from its own threads; connection_created
+        # installs count_queries there (see signals.py)
+        recorder = _Recorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+
+        if getattr(response, "streaming", False):
+            # the body runs its queries as it is read, so the request is
+            # recorded once it has been sent, and no headers can carry the totals
+            return keep_context(response, _recorder, recorder, lambda: self.record(match, recorder, started))
+
+        total = self.record(match, recorder, started)
+        if self.headers:
+            response["X-DB-Queries"] = str(recorder.queries)
+            response["X-DB-Time-ms"] = f"{recorder.db_time * 1000:.2f}"
+            response["X-Total-Time-ms"] = f"{total * 1000:.2f}"
+        return response
+
+    def record(self, match, recorder, started):
+        total = time.perf_counter() - started
+        name = match.url_name or match.view_name
+        record(name, recorder.queries, recorder.db_time, total)
+
+        budget = getattr(match.func, "query_budget", None)
+        if budget is not None and recorder.queries > budget:
+            logger.warning("%s ran %d queries (budget %d)", name, recorder.queries, budget)
+        return total
@@ -0,0 +1,13 @@
+from django.db.models import Q
+
+
+def prefix_q(field, prefix):
+    """
+    `field LIKE 'prefix%'` written as a half-open range, so the B-tree index
+    on the column is used on every backend. SQLite's case-insensitive LIKE
+    cannot use an ordinary index and would scan the table instead.
+    """
+    if not prefix:
+        return Q()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": upper})
@@ -0,0 +1,277 @@
+import math
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import tombstones
+from .geo import EARTH_RADIUS_KM
+from .models import Owner
+from .search import FIELD_WEIGHTS, tokenize
+
+FEATURE_DIMS = 32
+INITIAL_CAPACITY = 1024
+DEFAULT_K = 10
+MAX_K = 100
+
+# score = TEXT * cosine(location/address tokens)
+#       + DISTANCE * exp(-km / DISTANCE_SCALE_KM)   (only when a point is given)
+#       + FRESHNESS * exp(-age_days / FRESHNESS_DAYS)
+TEXT_WEIGHT = 1.0
+DISTANCE_WEIGHT = 0.5
+DISTANCE_SCALE_KM = 5.0
+FRESHNESS_WEIGHT = 0.1
+FRESHNESS_DAYS = 30.0
+FRESHNESS_SECONDS = FRESHNESS_DAYS * 86400
+
+
+# FEATURES
+@lru_cache(maxsize=65536)
+def _bucket(token):
+    # hashed feature with a sign bit, so collisions cancel out on average
+    h = zlib.crc32(token.encode())
+    return h % FEATURE_DIMS, (1.0 if h & 0x80000000 else -1.0)
+
+
+def token_weights(location, address):
+    weights = Counter()
+    for field, text in (("location", location), ("address", address)):
+        for token in tokenize(text):
+            weights[token] += FIELD_WEIGHTS[field]
+    return weights
+
+
+def text_vector(location, address):
+    vec = np.zeros(FEATURE_DIMS, dtype=np.float32)
+    for token, weight in token_weights(location, address).items():
+        bucket, sign = _bucket(token)
+        vec[bucket] += sign * weight
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def haversine_km_vec(lat, lon, rad_lats, rad_lons, cos_lats):
+    """Distances from one point to many; the many are pre-converted to radians."""
+    p = np.radians(lat)
+    a = np.sin((rad_lats - p) / 2) ** 2
+    a += np.cos(p) * cos_lats * np.sin((rad_lons - np.radians(lon)) / 2) ** 2
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * EARTH_RADIUS_KM
+    return a
+
+
+# MATRIX
+class OwnerMatrix:
+    """
+    One row per owner: a hashed, L2-normalised location/address vector,
+    coordinates in radians (NaN when unknown) and a freshness factor.
+    Everything that does not depend on the query is computed on write.
+    Rows are written in place by owner id, so an Owner save touches one
+    row; deleted rows are masked and their slots reused.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.features = np.zeros((capacity, FEATURE_DIMS), dtype=np.float32)
+        self.lats = np.full(capacity, np.nan)  # radians
+        self.lons = np.full(capacity, np.nan)
+        self.cos_lats = np.full(capacity, np.nan)
+        # exp((updated_at - epoch) / FRESHNESS_DAYS); a query multiplies by
+        # exp((epoch - now) / FRESHNESS_DAYS) to get exp(-age / FRESHNESS_DAYS)
+        self.epoch = time.time()
+        self.freshness = np.zeros(capacity)
+        self.size = 0
+        self.rows = {}
+        self.free = []
+        self.synced_at = None  # database rows and tombstones are read up to here
+        self.checked_at = None  # time.monotonic() of the last sync
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - len(self.ids)
+        self.ids = np.concatenate([self.ids, np.full(extra, -1, dtype=np.int64)])
+        self.features = np.concatenate([self.features, np.zeros((extra, FEATURE_DIMS), dtype=np.float32)])
+        self.lats = np.concatenate([self.lats, np.full(extra, np.nan)])
+        self.lons = np.concatenate([self.lons, np.full(extra, np.nan)])
+        self.cos_lats = np.concatenate([self.cos_lats, np.full(extra, np.nan)])
+        self.freshness = np.concatenate([self.freshness, np.zeros(extra)])
+
+    def _slot(self, pk):
+        row = self.rows.get(pk)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                self._grow(self.size + 1)
+                row = self.size
+                self.size += 1
+            self.rows[pk] = row
+            self.ids[row] = pk
+        return row
+
+    def upsert_rows(self, rows):
+        """rows: iterable of (id, location, address, latitude, longitude, updated_at)."""
+        with self._lock:
+            for pk, location, address, lat, lon, updated_at in rows:
+                row = self._slot(pk)
+                self.features[row] = text_vector(location, address)
+                if lat is None or lon is None:
+                    self.lats[row] = self.lons[row] = self.cos_lats[row] = np.nan
+                else:
+                    self.lats[row], self.lons[row] = math.radians(lat), math.radians(lon)
+                    self.cos_lats[row] = math.cos(self.lats[row])
+                self.freshness[row] = math.exp((updated_at.timestamp() - self.epoch) / FRESHNESS_SECONDS)
+
+    def remove(self, pk):
+        with self._lock:
+            row = self.rows.pop(pk, None)
+            if row is not None:
+                self.ids[row] = -1
+                self.features[row] = 0
+                self.free.append(row)
+
+    def clear(self):
+        with self._lock:
+            self._allocate(INITIAL_CAPACITY)
+
+    # SCORING
+    def scores(self, query, lat=None, lon=None, now=None):
+        n = self.size
+        scores = (self.features[:n] @ query).astype(np.float64)
+        scores *= TEXT_WEIGHT
+        if lat is not None and lon is not None:
+            distance = haversine_km_vec(lat, lon, self.lats[:n], self.lons[:n], self.cos_lats[:n])
+            distance *= -1 / DISTANCE_SCALE_KM
+            np.exp(distance, out=distance)
+            distance *= DISTANCE_WEIGHT
+            scores += np.nan_to_num(distance, copy=False)  # owners without coordinates get 0
+        now = time.time() if now is None else now
+        decay = FRESHNESS_WEIGHT * math.exp((self.epoch - now) / FRESHNESS_SECONDS)
+        scores += decay * self.freshness[:n]
+        scores[self.ids[:n] < 0] = -np.inf
+        return scores
+
+    def top_k(self, query, k=DEFAULT_K, lat=None, lon=None, now=None):
+        """[(owner_id, score)] best first, selected with argpartition in O(n)."""
+        with self._lock:
+            scores = self.scores(query, lat, lon, now)
+            k = min(k, len(self.rows))
+            if k <= 0:
+                return []
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+
+matrix = OwnerMatrix()
+_load_lock = threading.Lock()
+_sync_lock = threading.Lock()
+
+ROW_FIELDS = ("id", "location", "address", "latitude", "longitude", "updated_at")
+
+
+def _sync_seconds():
+    return getattr(settings, "RECOMMEND_SYNC_SECONDS", 5)
+
+
+def _sync_overlap():
+    return timedelta(seconds=getattr(settings, "RECOMMEND_SYNC_OVERLAP_SECONDS", 60))
+
+
+def load():
+    """A complete matrix of every owner, built off to the side."""
+    fresh = OwnerMatrix()
+    fresh.synced_at = timezone.now()
+    fresh.upsert_rows(Owner.objects.values_list(*ROW_FIELDS).iterator(chunk_size=5000))
+    fresh.checked_at = time.monotonic()
+    return fresh
+
+
+def sync(target):
+    """
+    Apply the owners saved and deleted since the last sync: rows whose
+    updated_at, and tombstones whose deleted_at, is past the watermark,
+    both on their index. Reading from RECOMMEND_SYNC_OVERLAP_SECONDS
+    before it catches transactions that committed after a later one and
+    clocks that differ between workers; re-applying a row is harmless.
+    """
+    started = timezone.now()
+    since = target.synced_at - _sync_overlap()
+    target.upsert_rows(Owner.objects.filter(updated_at__gte=since).values_list(*ROW_FIELDS).iterator(chunk_size=5000))
+    for pk in tombstones.deleted_since(since):
+        target.remove(pk)
+    target.synced_at = started
+    target.checked_at = time.monotonic()
+
+
+def _expired(target):
+    # tombstones older than the watermark may have been pruned already
+    return target.synced_at - _sync_overlap() < timezone.now() - tombstones.retention()
+
+
+def ensure_fresh(force=False):
+    """
+    Load the matrix on first use, then sync it at most once every
+    RECOMMEND_SYNC_SECONDS. This process's own saves and deletes are
+    applied when they commit; the sync picks up other workers and bulk
+    writes. A load runs under a lock and the matrix is only published
+    once it is complete, so concurrent requests wait for the first one
+    instead of scoring a partial matrix. The same happens when the
+    watermark falls behind the tombstones kept. A sync already running
+    in another thread is not waited for.
+    """
+    global matrix
+
+    if matrix.checked_at is None or _expired(matrix):
+        with _load_lock:
+            if matrix.checked_at is None or _expired(matrix):
+                matrix = load()
+        return
+    if not force and time.monotonic() - matrix.checked_at < _sync_seconds():
+        return
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        sync(matrix)
+    finally:
+        _sync_lock.release()
+
+
+def owner_changed(owner):
+    # on commit, so a rolled back save never reaches the matrix
+    row = (owner.id, owner.location, owner.address, owner.latitude, owner.longitude,
+           owner.updated_at or timezone.now())
+
+    def apply():
+        if matrix.checked_at is not None:  # nothing to patch before the first load
+            matrix.upsert_rows([row])
+
+    transaction.on_commit(apply)
+
+
+def owner_removed(pk):
+    transaction.on_commit(lambda: matrix.remove(pk))
+
+
+def recommend(location, address="", lat=None, lon=None, k=DEFAULT_K):
+    ensure_fresh()
+    return matrix.top_k(text_vector(location, address), k=k, lat=lat, lon=lon)
@@ -0,0 +1,52 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to DRF's stdlib renderer
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack support is optional
+    msgpack = None
+
+# DRF's own encoder turns datetimes into ISO 8601 with a trailing 'Z',
+# Decimals into floats, lazy strings into str, and so on. Both renderers
+# fall back to it, so the payload is the same whichever format is used.
+_drf_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. Datetimes are passed through to DRF's
+    encoder so the output is byte-for-byte what JSONRenderer produces for
+    compact responses.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_drf_default, option=option)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_drf_default, use_bin_type=True, datetime=False)
+
+
+class LegacyMessagePackRenderer(MessagePackRenderer):
+    media_type = "application/x-msgpack"
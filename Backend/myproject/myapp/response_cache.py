@@ -0,0 +1,95 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = "resp:gen:{}"
+STATS_KEY = "resp:stats:{}:{}"
+
+# which cached endpoint groups a model change makes stale
+INVALIDATES = {
+    "Owner": ("owners",),
+    "Tenant": ("tenants",),
+    "User": ("owners", "tenants"),
+}
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def _bump(cache, key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+# GENERATIONS
+def get_generation(group):
+    cache = get_cache()
+    key = GENERATION_KEY.format(group)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 0, None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+def invalidate(*groups):
+    """
+    Bumping the generation orphans every key of the group at once, with no
+    key scan; the old entries simply age out.
+    """
+    cache = get_cache()
+    for group in groups:
+        _bump(cache, GENERATION_KEY.format(group))
+
+
+# LOOKUP
+def cache_key(group, request):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()
+    return f"resp:{group}:{get_generation(group)}:{request.path}:{digest}"
+
+
+def cached_data(group, request, build):
+    """Return (data, hit). build() is only called on a miss."""
+    cache = get_cache()
+    key = cache_key(group, request)
+    data = cache.get(key)
+    if data is not None:
+        _bump(cache, STATS_KEY.format(group, "hits"))
+        return data, True
+
+    data = build()
+    cache.set(key, data, _timeout())
+    _bump(cache, STATS_KEY.format(group, "misses"))
+    return data, False
+
+
+def mark(response, hit):
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+def stats():
+    cache = get_cache()
+    groups = sorted({g for gs in INVALIDATES.values() for g in gs})
+    result = {}
+    for group in groups:
+        hits = cache.get(STATS_KEY.format(group, "hits"), 0)
+        misses = cache.get(STATS_KEY.format(group, "misses"), 0)
+        total = hits + misses
+        result[group] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+            "generation": get_generation(group),
+        }
+    return result
@@ -0,0 +1,124 @@
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+
+from .models import Owner, OwnerSearchToken
+from .query_utils import prefix_q
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TOKENS = 8
+
+# a hit on the location counts more than a hit on the street address
+FIELD_WEIGHTS = {"location": 2, "address": 1}
+
+
+def tokenize(text):
+    return [t[:MAX_TOKEN_LENGTH] for t in TOKEN_RE.findall((text or "").lower()) if len(t) > 1]
+
+
+def owner_token_weights(owner):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(owner, field, "")):
+            weights[token] += weight
+    return weights
+
+
+# INDEX MAINTENANCE
+def index_owner(owner, created=False):
+    """
+    Replace the postings of one owner. Only the tokens that changed are
+    written, so re-saving an owner with the same text costs one SELECT;
+    a new owner has no postings to read.
+    """
+    wanted = owner_token_weights(owner)
+    if created:
+        OwnerSearchToken.objects.bulk_create(
+            [OwnerSearchToken(owner=owner, token=t, weight=w) for t, w in wanted.items()]
+        )
+        return
+    current = dict(
+        OwnerSearchToken.objects.filter(owner=owner).values_list("token", "weight")
+    )
+
+    stale = [t for t in current if t not in wanted]
+    changed = [t for t, w in wanted.items() if t in current and current[t] != w]
+    added = [t for t in wanted if t not in current]
+
+    with transaction.atomic():
+        if stale or changed:
+            OwnerSearchToken.objects.filter(owner=owner, token__in=stale + changed).delete()
+        if changed or added:
+            OwnerSearchToken.objects.bulk_create(
+                [OwnerSearchToken(owner=owner, token=t, weight=wanted[t]) for t in changed + added]
+            )
+
+
+def index_new_owners(owners):
+    """Postings for owners created by bulk_create, which sends no post_save."""
+    OwnerSearchToken.objects.bulk_create(
+        [OwnerSearchToken(owner_id=owner.id, token=t, weight=w)
+         for owner in owners for t, w in owner_token_weights(owner).items()]
+    )
+
+
+def rebuild_index(batch_size=1000):
+    OwnerSearchToken.objects.all().delete()
+    batch = []
+    count = 0
+    for owner in Owner.objects.only("id", "location", "address").iterator(chunk_size=batch_size):
+        batch.extend(
+            OwnerSearchToken(owner_id=owner.id, token=t, weight=w)
+            for t, w in owner_token_weights(owner).items()
+        )
+        count += 1
+        if len(batch) >= batch_size:
+            OwnerSearchToken.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        OwnerSearchToken.objects.bulk_create(batch)
+    return count
+
+
+# QUERY
+def ranked_postings(query):
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    if not terms:
+        return None
+
+    *exact, last = terms
+    match = prefix_q("token", last)
+    # the query term each posting matched; a prefix can match several
+    # tokens of one owner, which still counts as one term
+    term = Value(last)
+    if exact:
+        match |= Q(token__in=exact)
+        term = Case(When(token__in=exact, then=F("token")), default=term)
+
+    return (
+        OwnerSearchToken.objects.filter(match)
+        .values("owner_id")
+        .annotate(matched=Count(term, distinct=True), score=Sum("weight"))
+        .order_by("-matched", "-score", "-owner_id")
+    )
+
+
+def search_owner_ids(query, offset=0, limit=20):
+    """
+    Rank owners by how many distinct query terms they match, then by the
+    summed field weight. The last term is matched as a prefix so results
+    show up while the user is still typing; every lookup is an index
+    range scan on token, never a LIKE '%x%'.
+
+    Returns (ids, has_more).
+    """
+    ranked = ranked_postings(query)
+    if ranked is None:
+        return [], False
+
+    rows = list(ranked[offset:offset + limit + 1])
+    has_more = len(rows) > limit
+    return [r["owner_id"] for r in rows[:limit]], has_more
@@ -19,5 +19,4 @@ class OwnerSerializer(serializers.ModelSerializer):
 class TenantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tenant
-        fields = '_all__'
-        
\ No newline at end of file
+        fields = '__all__'
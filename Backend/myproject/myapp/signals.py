@@ -0,0 +1,113 @@
+import sys
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import admin_stats, events, location_index, query_metrics, response_cache, tombstones
+from .models import Owner, Tenant, User
+from .search import index_owner
+
+# imported on first use rather than at app load: recommendations pulls in
+# numpy and authentication pulls in DRF/simplejwt, which boot doesn't need
+RECOMMENDATIONS = "myapp.recommendations"
+
+
+# OWNER SEARCH INDEX
+# postings are removed by the FK cascade when an owner is deleted
+@receiver(post_save, sender=Owner)
+def reindex_owner(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    index_owner(instance, created)
+
+
+# OWNER RECOMMENDATION MATRIX
+# the matrix only exists once recommendations has been imported; before
+# that there is nothing to patch, and the first load reads every row.
+# Deletes always leave a tombstone, which is how other workers learn of them
+@receiver(post_save, sender=Owner)
+def refresh_owner_features(sender, instance, raw=False, **kwargs):
+    recommendations = sys.modules.get(RECOMMENDATIONS)
+    if raw or recommendations is None:
+        return
+    recommendations.owner_changed(instance)
+
+
+@receiver(post_delete, sender=Owner)
+def drop_owner_features(sender, instance, **kwargs):
+    tombstones.owner_deleted(instance.pk)
+    recommendations = sys.modules.get(RECOMMENDATIONS)
+    if recommendations is not None:
+        recommendations.owner_removed(instance.pk)
+
+
+# TOKEN CLAIMS CACHE
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_claims(sender, instance, **kwargs):
+    from .authentication import forget_user_claims
+
+    forget_user_claims(instance.pk)
+
+
+# LIST RESPONSE CACHE
+@receiver(post_save, sender=Owner)
+@receiver(post_delete, sender=Owner)
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_lists(sender, **kwargs):
+    response_cache.invalidate(*response_cache.INVALIDATES[sender.__name__])
+
+
+# ADMIN STATS COUNTERS (and the location autocomplete index, which
+# follows the owner_location counters)
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Owner)
+def remember_stat_fields(sender, instance, **kwargs):
+    admin_stats.remember(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Owner)
+@receiver(post_save, sender=Tenant)
+def count_saved_row(sender, instance, created, raw=False, **kwargs):
+    if raw:  # loaddata; run rebuild_admin_stats afterwards
+        return
+    deltas = admin_stats.row_saved(instance, created)
+    if sender is Owner:
+        location_index.counters_changed(deltas)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Owner)
+@receiver(post_delete, sender=Tenant)
+def count_deleted_row(sender, instance, **kwargs):
+    deltas = admin_stats.row_deleted(instance)
+    if sender is Owner:
+        location_index.counters_changed(deltas)
+
+
+# ADMIN EVENT STREAM
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Owner)
+@receiver(post_save, sender=Tenant)
+def publish_saved_row(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    events.row_saved(instance, created)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Owner)
+@receiver(post_delete, sender=Tenant)
+def publish_deleted_row(sender, instance, **kwargs):
+    events.row_deleted(instance)
+
+
+# QUERY METRICS
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs):
+    query_metrics.install(connection)
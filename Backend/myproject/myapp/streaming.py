@@ -0,0 +1,45 @@
+def _steps(iterator, var, value, on_close):
+    try:
+        while True:
+            token = var.set(value)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                var.reset(token)
+            yield chunk
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+async def _asteps(iterator, var, value, on_close):
+    try:
+        while True:
+            token = var.set(value)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                var.reset(token)
+            yield chunk
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+def keep_context(response, var, value, on_close=None):
+    """
+    Set var to value around every chunk of a StreamingHttpResponse. A
+    middleware's context variables are reset when the view returns, but a
+    streamed body only runs after that, while the server reads it; without
+    this its queries would miss the middleware's state. on_close runs once
+    the body is exhausted or the response is closed.
+    """
+    if response.is_async:
+        response.streaming_content = _asteps(aiter(response.streaming_content), var, value, on_close)
+    else:
+        response.streaming_content = _steps(iter(response.streaming_content), var, value, on_close)
+    return response
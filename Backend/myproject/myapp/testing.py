@@ -0,0 +1,30 @@
+from urllib.parse import urlsplit
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin. assertWithinQueryBudget() performs the request with
+    self.client and fails if the view runs more SQL queries than the
+    budget it declares with @query_budget, so N+1 regressions fail CI.
+    """
+
+    def assertWithinQueryBudget(self, method, path, *args, using="default", **kwargs):
+        match = resolve(urlsplit(path).path)
+        budget = getattr(match.func, "query_budget", None)
+        if budget is None:
+            self.fail(f"{match.view_name} declares no @query_budget")
+
+        with CaptureQueriesContext(connections[using]) as ctx:
+            response = getattr(self.client, method.lower())(path, *args, **kwargs)
+            if getattr(response, "streaming", False):
+                # drained here so the queries it runs count, then put back for the test
+                response.streaming_content = [b"".join(response.streaming_content)]
+
+        if len(ctx) > budget:
+            queries = "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1))
+            self.fail(f"{match.view_name} ran {len(ctx)} queries, budget is {budget}:\n{queries}")
+        return response
@@ -1,3 +1,715 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, connections
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import admin_stats, events, location_index, query_metrics
+from .authentication import forget_user_claims
+from .db_routing import ReplicaRouter, ReplicaRoutingMiddleware, use_replica
+from .fieldsets import OWNER_FIELDS
+from .models import Owner, OwnerTombstone, StatCounter, Tenant, User
+from .search import search_owner_ids
+from .serializers import OwnerSerializer
+from .testing import QueryBudgetMixin
+from .view.auth_views import get_tokens_for_user
+
+
+def bearer(user):
+    return f"Bearer {get_tokens_for_user(user)['access']}"
+
+
+# every request runs cold: no claims or list cache, no remembered stat
+# counters and no loaded location index, so a budget holds for the worst case
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ApiTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        admin_stats._known.clear()
+        location_index.index.checked_at = None
+        self.admin = User.objects.create_user(
+            username="admin", password="pw", role="admin", is_staff=True, is_superuser=True,
+        )
+        self.client.defaults["HTTP_AUTHORIZATION"] = bearer(self.admin)
+
+    def request(self, method, path, *args, **kwargs):
+        """assertWithinQueryBudget() with the claims and stat counters forgotten first."""
+        for pk in User.objects.values_list("id", flat=True):
+            forget_user_claims(pk)
+        admin_stats._known.clear()
+        return self.assertWithinQueryBudget(method, path, *args, **kwargs)
+
+    def post_json(self, path, data, **kwargs):
+        return self.request("post", path, json.dumps(data), content_type="application/json", **kwargs)
+
+    def make_user(self, username, role="tenant", **fields):
+        return User.objects.create_user(username=username, password="pw", role=role, **fields)
+
+    def make_owner(self, username, location="", **fields):
+        user = self.make_user(username, role="owner")
+        fields.setdefault("address", f"{username} street")
+        return Owner.objects.create(user=user, phone="555", location=location, **fields)
+
+    def make_tenant(self, username, location="", **fields):
+        user = self.make_user(username)
+        fields.setdefault("address", f"{username} street")
+        return Tenant.objects.create(user=user, phone="555", location=location, **fields)
+
+
+class RegisterLoginTests(ApiTestCase):
+    def test_register_user(self):
+        response = self.request(
+            "post", "/api/register-user/", {"username": "t1", "password": "pw", "role": "tenant"},
+            HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.objects.get(username="t1").role, "tenant")
+
+        response = self.request(
+            "post", "/api/register-user/", {"username": "a2", "password": "pw", "role": "admin"},
+            HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_admin_only_once(self):
+        response = self.request(
+            "post", "/api/register/", {"username": "admin2", "password": "pw"}, HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Admin already exists"})
+
+    def test_login(self):
+        self.make_user("t1")
+        response = self.request("post", "/api/login/", {"username": "admin", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        response = self.request("post", "/api/login/", {"username": "t1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 403)
+        response = self.request("post", "/api/login-user/", {"username": "t1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        response = self.request("post", "/api/login-user/", {"username": "t1", "password": "no"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 401)
+
+
+class UserDetailTests(ApiTestCase):
+    def test_get(self):
+        user = self.make_user("t1")
+        response = self.request("get", f"/api/list/{user.id}")
+        self.assertEqual(response.json()["username"], "t1")
+        self.assertEqual(self.request("get", "/api/list/999999").status_code, 404)
+
+    def test_update(self):
+        user = self.make_user("t1")
+        response = self.request("put", f"/api/list/{user.id}", json.dumps({"role": "owner"}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.role, "owner")
+
+    def test_delete_owner_with_profile(self):
+        owner = self.make_owner("o1", location="Brooklyn")
+        response = self.request("delete", f"/api/list/{owner.user_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Owner.objects.filter(id=owner.id).exists())
+        self.assertEqual(self.request("delete", f"/api/list/{self.admin.id}").status_code, 403)
+
+
+class QueryMetricsTests(ApiTestCase):
+    def test_snapshot(self):
+        self.request("get", "/api/list-users/")
+        response = self.request("get", "/api/query-metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("list_all_users", json.dumps(response.json()))
+
+class KeysetPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            self.make_user(f"o{i}", role="owner")
+            self.make_user(f"t{i}")
+
+    def test_cursor_walks_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            path = "/api/list-users/?limit=4" + (f"&cursor={cursor}" if cursor else "")
+            response = self.request("get", path)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen += [row["username"] for row in body["results"]]
+            cursor = body["next"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(User.objects.order_by("created_at", "id").values_list("username", flat=True)))
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.request("get", "/api/list-users/?cursor=nope").status_code, 400)
+
+    def test_ndjson_stream(self):
+        response = self.request("get", "/api/list-tenants/?stream=ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["username"] for row in rows], [f"t{i}" for i in range(5)])
+
+class OwnerSearchTests(ApiTestCase):
+    def test_search(self):
+        self.make_owner("o1", location="Park Slope", address="7th Avenue")
+        match = self.make_owner("o2", location="Park Slope", address="Park Place")
+        self.make_owner("o3", location="Bushwick")
+        response = self.request("get", "/api/search-owners/?q=park&limit=1")
+        body = response.json()
+        self.assertEqual([row["id"] for row in body["results"]], [match.id])
+        self.assertEqual(body["next"], 2)
+        body = self.request("get", "/api/search-owners/?q=park&limit=1&page=2").json()
+        self.assertEqual(len(body["results"]), 1)
+        self.assertIsNone(body["next"])
+        self.assertEqual(self.request("get", "/api/search-owners/").status_code, 400)
+
+    def test_postings_follow_edits(self):
+        owner = self.make_owner("o1", location="Park Slope")
+        owner.location = "Bushwick"
+        owner.save()
+        self.assertEqual(self.request("get", "/api/search-owners/?q=park").json()["results"], [])
+        self.assertEqual(len(self.request("get", "/api/search-owners/?q=bushwick").json()["results"]), 1)
+
+    def test_new_owner_indexed_within_register_budget(self):
+        response = self.request(
+            "post", "/api/owner-register/", {"username": "o1", "password": "pw", "location": "Park Slope"},
+            HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.request("get", "/api/search-owners/?q=slope").json()["results"]), 1)
+
+    def test_rank_counts_distinct_terms(self):
+        # "park pl": o1 matches both terms, o2 only the prefix, with three tokens
+        both = self.make_owner("o1", location="Park", address="Plaza")
+        prefix = self.make_owner("o2", location="Place", address="Plains Plum Plot")
+        self.assertEqual(search_owner_ids("park pl")[0], [both.id, prefix.id])
+
+class NearbyOwnersTests(ApiTestCase):
+    def test_radius_and_box(self):
+        near = self.make_owner("o1", latitude=40.7580, longitude=-73.9855)
+        far = self.make_owner("o2", latitude=40.6892, longitude=-74.0445)
+        self.make_owner("o3")
+        response = self.request("get", "/api/nearby-owners/?lat=40.7590&lon=-73.9845&radius_km=20")
+        rows = response.json()
+        self.assertEqual([row["id"] for row in rows], [near.id, far.id])
+        self.assertLess(rows[0]["distance_km"], 1)
+        self.assertGreater(rows[1]["distance_km"], 5)
+
+        response = self.request("get", "/api/nearby-owners/?min_lat=40.7&min_lon=-74&max_lat=40.8&max_lon=-73.9")
+        self.assertEqual([row["id"] for row in response.json()], [near.id])
+        self.assertEqual(self.request("get", "/api/nearby-owners/?lat=1&lon=1&radius_km=0").status_code, 400)
+
+class ClaimsAuthenticationTests(ApiTestCase):
+    def test_only_admins(self):
+        user = self.make_user("t1")
+        response = self.request("get", "/api/list-users/", HTTP_AUTHORIZATION=bearer(user))
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_change_is_seen(self):
+        user = self.make_user("t1", is_staff=True)
+        token = bearer(user)
+        user.role = "admin"
+        user.save()
+        self.assertEqual(self.request("get", "/api/list-users/", HTTP_AUTHORIZATION=token).status_code, 401)
+
+class BulkImportTests(ApiTestCase):
+    def test_csv_import(self):
+        body = "username,password,role\nn1,pw,owner\nn2,pw,tenant\nadmin,pw,tenant\n"
+        response = self.client.post("/api/bulk-import-users/", body, content_type="text/csv")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(response.json()["errors"][0]["username"], "admin")
+        self.assertTrue(User.objects.get(username="n1").check_password("pw"))
+
+    def test_imported_users_get_profiles(self):
+        body = "username,password,role,location\nn1,pw,owner,Park Slope\nn2,pw,tenant,Harlem\n"
+        self.client.post("/api/bulk-import-users/", body, content_type="text/csv")
+        owner = Owner.objects.get(user__username="n1")
+        self.assertEqual(owner.location, "Park Slope")
+        self.assertEqual(Tenant.objects.get(user__username="n2").location, "Harlem")
+        self.assertEqual(search_owner_ids("slope")[0], [owner.id])
+        self.assertEqual(StatCounter.objects.get(kind="total", key="owners").count, 1)
+
+        for kind, username in (("owner", "n1"), ("tenant", "n2")):
+            response = self.request(
+                "post", f"/api/{kind}-login/", {"username": username, "password": "pw"}, HTTP_AUTHORIZATION="",
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_row_by_row_retry_inserts(self):
+        # a bulk INSERT that failed part way can leave ids on the objects
+        def bulk_create(users, *args, **kwargs):
+            for n, user in enumerate(users):
+                user.pk = 9000 + n
+                user._state.adding = False
+            raise IntegrityError
+
+        body = "username,password,role\nn1,pw,owner\nn2,pw,tenant\n"
+        with mock.patch.object(User.objects, "bulk_create", bulk_create):
+            response = self.client.post("/api/bulk-import-users/", body, content_type="text/csv")
+        self.assertEqual(response.json()["created"], 2)
+        users = User.objects.filter(username__in=["n1", "n2"])
+        self.assertFalse(users.filter(id__gte=9000).exists())
+        self.assertEqual(Owner.objects.filter(user__in=users).count() + Tenant.objects.filter(user__in=users).count(), 2)
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            self.make_owner(f"o{i}", location="Harlem", latitude=40.8, longitude=-73.9)
+
+    def test_csv(self):
+        response = self.request("get", "/api/export-users/")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["username"] for row in rows], ["admin", "o0", "o1", "o2"])
+        self.assertTrue(rows[0]["created_at"].endswith("Z"))
+
+    def test_ndjson_matches_csv_dates(self):
+        response = self.request("get", "/api/export-owners/?output=ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["location"] for row in rows], ["Harlem"] * 3)
+        response = self.request("get", "/api/export-owners/")
+        first = next(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(first["updated_at"], rows[0]["updated_at"])
+
+    def test_errors(self):
+        self.assertEqual(self.request("get", "/api/export-nothing/").status_code, 404)
+        self.assertEqual(self.request("get", "/api/export-users/?output=xml").status_code, 400)
+
+    def test_gzip_is_a_gz_file(self):
+        response = self.request("get", "/api/export-owners/?output=ndjson&gzip=1", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="owners.ndjson.gz"')
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 3)
+
+class ListCacheTests(ApiTestCase):
+    def test_cached_until_a_write(self):
+        for i in range(3):
+            self.make_owner(f"o{i}")
+        self.assertEqual(len(self.request("get", "/api/all-owners/").json()), 3)
+        self.assertEqual(len(self.request("get", "/api/all-owners/").json()), 3)
+        self.make_owner("o3")
+        self.assertEqual(len(self.request("get", "/api/all-owners/").json()), 4)
+
+        self.make_tenant("t1")
+        self.assertEqual(len(self.request("get", "/api/all-tenants/").json()), 1)
+        stats = self.request("get", "/api/cache-stats/").json()
+        self.assertIn("owners", json.dumps(stats))
+
+class ConditionalGetTests(ApiTestCase):
+    def test_list_etag(self):
+        self.make_user("t1")
+        etag = self.request("get", "/api/list-users/")["ETag"]
+        response = self.request("get", "/api/list-users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.make_user("late")
+        response = self.request("get", "/api/list-users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_record_etag(self):
+        user = self.make_user("t1")
+        response = self.request("get", f"/api/list/{user.id}")
+        response = self.request("get", f"/api/list/{user.id}", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_all_owners_etag(self):
+        self.make_owner("o1")
+        response = self.request("get", "/api/all-owners/")
+        response = self.request("get", "/api/all-owners/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_ignores_if_modified_since(self):
+        self.make_user("t1")
+        doomed = self.make_user("t2")
+        response = self.request("get", "/api/list-users/")
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        # a delete does not move MAX(updated_at); only the ETag notices
+        doomed.delete()
+        since = (timezone.now() + timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+        response = self.request("get", "/api/list-users/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+class SparseFieldsetTests(ApiTestCase):
+    def test_list_fields(self):
+        self.make_user("t1")
+        response = self.request("get", "/api/list-tenants/?fields=id,username")
+        self.assertEqual(set(response.json()["results"][0]), {"id", "username"})
+        response = self.request("get", "/api/list-tenants/?stream=ndjson&fields=username")
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"username": "t1"})
+        self.assertEqual(self.request("get", "/api/list-tenants/?fields=password").status_code, 400)
+
+    def test_search_fields(self):
+        owner = self.make_owner("o1", location="Park Slope")
+        response = self.request("get", "/api/search-owners/?q=park&fields=id,location")
+        self.assertEqual(response.json()["results"], [{"id": owner.id, "location": "Park Slope"}])
+
+    def test_profile_fields_trim_the_select(self):
+        owner = self.make_owner("o1", location="Park Slope")
+        full = self.request("get", "/api/owner-profile/", HTTP_AUTHORIZATION=bearer(owner.user)).json()
+        self.assertEqual(full, {f: OwnerSerializer(owner).data[f] for f in OWNER_FIELDS})
+
+        with CaptureQueriesContext(connections["default"]) as queries:
+            response = self.request(
+                "get", "/api/owner-profile/?fields=location", HTTP_AUTHORIZATION=bearer(owner.user),
+            )
+        self.assertEqual(response.json(), {"location": "Park Slope"})
+        select = queries[-1]["sql"]
+        self.assertNotIn('"address"', select)
+        self.assertIn('"location"', select)
+
+        tenant = self.make_tenant("t1", location="Harlem")
+        response = self.request("get", "/api/tenant-profile/?fields=id,location", HTTP_AUTHORIZATION=bearer(tenant.user))
+        self.assertEqual(response.json(), {"id": tenant.id, "location": "Harlem"})
+
+class UserFilterTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            self.make_user(f"o{i}", role="owner")
+
+    def test_sorted_by_username_with_role(self):
+        body = self.request("get", "/api/list-owners/?sort=-username&limit=3").json()
+        self.assertEqual([row["username"] for row in body["results"]], ["o4", "o3", "o2"])
+        response = self.request("get", f"/api/list-owners/?sort=-username&limit=3&cursor={body['next']}")
+        self.assertEqual([row["username"] for row in response.json()["results"]], ["o1", "o0"])
+
+    def test_prefix_filter(self):
+        body = self.request("get", "/api/list-users/?sort=username&username_prefix=o").json()
+        self.assertEqual([row["username"] for row in body["results"]], [f"o{i}" for i in range(5)])
+
+    def test_bad_filters(self):
+        self.assertEqual(self.request("get", "/api/list-users/?created_after=yesterday").status_code, 400)
+        self.assertEqual(self.request("get", "/api/list-users/?sort=address").status_code, 400)
+
+class RecommendOwnersTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import recommendations
+
+        self.recommendations = recommendations
+        recommendations.matrix = recommendations.OwnerMatrix()
+
+    def sync(self):
+        # what the next request after RECOMMEND_SYNC_SECONDS does
+        self.recommendations.ensure_fresh(force=True)
+        return self.recommendations.matrix
+
+    def test_recommend(self):
+        tenant = self.make_tenant("t1", location="Park Slope")
+        match = self.make_owner("o1", location="Park Slope")
+        self.make_owner("o2", location="Bushwick")
+        response = self.request("get", "/api/recommend-owners/?k=1", HTTP_AUTHORIZATION=bearer(tenant.user))
+        rows = response.json()
+        self.assertEqual([row["id"] for row in rows], [match.id])
+        self.assertIn("score", rows[0])
+
+        # a later change is picked up by the sync
+        match.location = "Bushwick"
+        match.save()
+        self.recommendations.matrix.checked_at -= 3600
+        response = self.request("get", f"/api/recommend-owners/?k=2&tenant_id={tenant.id}")
+        self.assertEqual(len(response.json()), 2)
+
+    def test_recommend_tenant_id(self):
+        self.assertEqual(self.request("get", "/api/recommend-owners/?tenant_id=abc").status_code, 400)
+        self.assertEqual(self.request("get", "/api/recommend-owners/?tenant_id=0").status_code, 400)
+        self.assertEqual(self.request("get", "/api/recommend-owners/?tenant_id=999999").status_code, 404)
+        tenant = self.make_tenant("t1")
+        response = self.request("get", "/api/recommend-owners/?tenant_id=1", HTTP_AUTHORIZATION=bearer(tenant.user))
+        self.assertEqual(response.status_code, 403)
+
+    def test_sync_reads_past_the_watermark(self):
+        # the commits of this test never happen, so only the sync updates the matrix
+        owners = [self.make_owner(f"o{i}", location="Queens") for i in range(3)]
+        self.recommendations.ensure_fresh()
+        self.assertEqual(len(self.recommendations.matrix), 3)
+
+        added = self.make_owner("o3", location="Queens")
+        self.post_json("/api/batch-delete-users/", {"ids": [owners[0].user_id, owners[1].user_id]})
+        with CaptureQueriesContext(connections["default"]) as queries:
+            matrix = self.sync()
+        self.assertEqual(sorted(matrix.rows), sorted([owners[2].id, added.id]))
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"updated_at" >=', queries[0]["sql"])
+        self.assertIn('"deleted_at" >=', queries[1]["sql"])
+
+        # rows behind the watermark are not read again
+        Owner.objects.filter(id=added.id).update(location="Bushwick", updated_at=timezone.now() - timedelta(days=1))
+        matrix = self.sync()
+        query = self.recommendations.text_vector("Queens", "")
+        self.assertEqual(len(matrix.top_k(query, k=5)), 2)
+
+    def test_tombstones(self):
+        OwnerTombstone.objects.create(owner_id=999999)
+        OwnerTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=30))
+        owners = [self.make_owner(f"o{i}") for i in range(3)]
+        with CaptureQueriesContext(connections["default"]) as queries:
+            self.post_json("/api/batch-delete-users/", {"ids": [owner.user_id for owner in owners]})
+        inserts = [q for q in queries if 'INSERT INTO "myapp_ownertombstone"' in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(sorted(OwnerTombstone.objects.values_list("owner_id", flat=True)), [o.id for o in owners])
+
+    def test_expired_watermark_reloads(self):
+        self.make_owner("o1")
+        self.recommendations.ensure_fresh()
+        loaded = self.recommendations.matrix
+        loaded.synced_at -= timedelta(days=30)
+        self.recommendations.ensure_fresh()
+        self.assertIsNot(self.recommendations.matrix, loaded)
+        self.assertEqual(len(self.recommendations.matrix), 1)
+
+    def test_first_load_is_published_complete(self):
+        self.make_owner("o1")
+        recommendations = self.recommendations
+        empty = recommendations.matrix
+        seen = []
+
+        def upsert_rows(matrix, rows):
+            # a request arriving mid-load still sees the unloaded matrix and
+            # would block on the load lock instead of scoring this one
+            seen.append((recommendations.matrix is empty, recommendations._load_lock.locked()))
+            original(matrix, rows)
+
+        original = recommendations.OwnerMatrix.upsert_rows
+        with mock.patch.object(recommendations.OwnerMatrix, "upsert_rows", upsert_rows):
+            recommendations.ensure_fresh()
+        self.assertEqual(seen, [(True, True)])
+        self.assertIsNot(recommendations.matrix, empty)
+        self.assertEqual(len(recommendations.matrix), 1)
+
+class LoginThrottleTests(ApiTestCase):
+    @override_settings(LOGIN_THROTTLE_RATES={"ip": (20, 30), "username": (2, 1)})
+    def test_throttled_before_hashing(self):
+        for _ in range(2):
+            response = self.request("post", "/api/login-user/", {"username": "t1", "password": "no"}, HTTP_AUTHORIZATION="")
+            self.assertEqual(response.status_code, 401)
+        with self.assertLogs("myapp.throttling", "DEBUG") as logs:
+            for _ in range(3):
+                response = self.request(
+                    "post", "/api/login-user/", {"username": "t1", "password": "no"}, HTTP_AUTHORIZATION="",
+                )
+                self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual([record.levelname for record in logs.records], ["WARNING", "DEBUG", "DEBUG"])
+
+        response = self.request("get", "/api/login-throttle-stats/")
+        self.assertEqual(response.json()["username"], {"allowed": 2, "rejected": 3})
+
+    @override_settings(LOGIN_THROTTLE_RATES={"ip": (2, 1), "username": (20, 30)})
+    def test_forwarded_for_does_not_pick_the_ip_bucket(self):
+        with self.assertLogs("myapp.throttling", "WARNING"):
+            codes = [
+                self.request(
+                    "post", "/api/login-user/", {"username": f"u{i}", "password": "no"},
+                    HTTP_AUTHORIZATION="", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}",
+                ).status_code
+                for i in range(4)
+            ]
+        self.assertEqual(codes, [401, 401, 429, 429])
+
+class AsyncAuthTests(ApiTestCase):
+    def test_register_and_login(self):
+        response = self.post_json(
+            "/api/register-user-async/", {"username": "t1", "password": "pw", "role": "tenant"}, HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.post_json("/api/login-user-async/", {"username": "t1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["role"], "tenant")
+        response = self.post_json("/api/login-async/", {"username": "admin", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        response = self.post_json("/api/register-async/", {"username": "root", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_admin(self):
+        self.admin.delete()
+        response = self.post_json("/api/register-async/", {"username": "root", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username="root").is_staff)
+
+class BatchTests(ApiTestCase):
+    def test_batch_update(self):
+        users = [self.make_user(f"t{i}") for i in range(20)]
+        patches = [{"id": user.id, "address": f"batch {user.id}"} for user in users]
+        patches[0]["role"] = "owner"
+        response = self.post_json("/api/batch-update-users/", {"users": patches + [{"id": 999999, "phone": "1"}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["not_found"], [999999])
+        self.assertEqual(User.objects.filter(address__startswith="batch").count(), 20)
+        self.assertEqual(User.objects.get(id=users[0].id).role, "owner")
+
+        response = self.post_json("/api/batch-update-users/", {"users": [{"id": users[0].id, "password": "x"}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_delete(self):
+        owners = [self.make_owner(f"o{i}", location="Queens") for i in range(5)]
+        tenants = [self.make_tenant(f"t{i}") for i in range(5)]
+        ids = [owner.user_id for owner in owners] + [tenant.user_id for tenant in tenants]
+        response = self.post_json("/api/batch-delete-users/", {"ids": ids + [999999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": sorted(ids), "not_found": [999999]})
+        self.assertFalse(Owner.objects.exists() or Tenant.objects.exists())
+
+        response = self.post_json("/api/batch-delete-users/", {"ids": [self.admin.id]})
+        self.assertEqual(response.status_code, 403)
+
+class ProfileTests(ApiTestCase):
+    def test_owner_register_and_login(self):
+        for name in ("o1", "o2"):
+            response = self.request(
+                "post", "/api/owner-register/", {"username": name, "password": "pw", "location": "Upper West Side"},
+                HTTP_AUTHORIZATION="",
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Owner.objects.get(user__username="o1").location, "Upper West Side")
+
+        response = self.request("post", "/api/owner-login/", {"username": "o1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        self.make_tenant("t1")
+        response = self.request("post", "/api/owner-login/", {"username": "t1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 403)
+
+    def test_tenant_register_and_login(self):
+        response = self.request(
+            "post", "/api/tenant-register/", {"username": "t1", "password": "pw", "location": "Harlem"},
+            HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.request("post", "/api/tenant-login/", {"username": "t1", "password": "pw"}, HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["profile"]["location"], "Harlem")
+
+    def test_profiles(self):
+        owner = self.make_owner("o1", location="Soho")
+        response = self.request("get", "/api/owner-profile/", HTTP_AUTHORIZATION=bearer(owner.user))
+        self.assertEqual(response.json()["location"], "Soho")
+        tenant = self.make_tenant("t1", location="Harlem")
+        response = self.request("get", "/api/tenant-profile/", HTTP_AUTHORIZATION=bearer(tenant.user))
+        self.assertEqual(response.json()["location"], "Harlem")
+        response = self.request("get", "/api/all-tenants/", HTTP_AUTHORIZATION=bearer(tenant.user))
+        self.assertEqual(response.status_code, 403)
+
+class AdminStatsTests(ApiTestCase):
+    def test_counters_follow_writes(self):
+        self.make_owner("o1", location="Astoria")
+        self.make_owner("o2", location="Astoria")
+        self.make_tenant("t1")
+        self.make_user("t2").delete()
+
+        response = self.request("get", "/api/admin-stats/?days=7&locations=5")
+        body = response.json()
+        self.assertEqual(body["totals"], {"users": 4, "owners": 2, "tenants": 1})
+        self.assertEqual(body["users_by_role"], {"admin": 1, "owner": 2, "tenant": 1})
+        self.assertEqual(body["owners_by_location"], [{"location": "Astoria", "count": 2}])
+        self.assertEqual(len(body["signups_per_day"]), 7)
+        self.assertEqual(body["signups_per_day"][-1]["count"], 4)
+
+        StatCounter.objects.all().delete()
+        admin_stats.rebuild()
+        self.assertEqual(self.request("get", "/api/admin-stats/?days=7&locations=5").json(), body)
+
+    def test_register_admin_counted_once(self):
+        self.admin.delete()
+        response = self.request(
+            "post", "/api/register/", {"username": "root", "password": "pw"}, HTTP_AUTHORIZATION="",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["role"], "admin")
+        roles = dict(StatCounter.objects.filter(kind="role").values_list("key", "count"))
+        self.assertEqual((roles.get("admin"), roles.get("tenant", 0)), (1, 0))
+
+    def test_bad_params(self):
+        self.assertEqual(self.request("get", "/api/admin-stats/?days=0").status_code, 400)
+        self.assertEqual(self.request("get", "/api/admin-stats/?locations=x").status_code, 400)
+
+class UserEventsTests(ApiTestCase):
+    def events(self, response):
+        return [
+            dict(line.split(": ", 1) for line in block.splitlines())
+            for block in b"".join(response.streaming_content).decode().split("\n\n") if block
+        ]
+
+    def test_replay_and_resume(self):
+        first = events.bus.publish("user.created", {"id": 1})
+        events.bus.publish("user.updated", {"id": 1})
+        response = self.request("get", f"/api/user-events/?follow=0&last_event_id={first.id}")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        blocks = self.events(response)
+        self.assertEqual(blocks[0], {"retry": "3000"})
+        self.assertEqual([block["event"] for block in blocks[1:]], ["user.updated"])
+
+        response = self.request("get", "/api/user-events/?follow=0", HTTP_LAST_EVENT_ID="stale-1")
+        self.assertEqual([block.get("event") for block in self.events(response)], [None, events.RESET])
+
+    def test_ticket_is_single_use(self):
+        ticket = self.request("post", "/api/user-events-ticket/").json()["ticket"]
+        response = self.request("get", f"/api/user-events/?follow=0&ticket={ticket}", HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 200)
+        response = self.request("get", f"/api/user-events/?follow=0&ticket={ticket}", HTTP_AUTHORIZATION="")
+        self.assertEqual(response.status_code, 401)
+
+    def test_admin_only(self):
+        tenant = self.make_user("t1")
+        response = self.request("get", "/api/user-events/?follow=0", HTTP_AUTHORIZATION=bearer(tenant))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.request("get", "/api/user-events/", HTTP_AUTHORIZATION="").status_code, 401)
+        self.assertEqual(self.request("get", "/api/user-events/?access_token=x", HTTP_AUTHORIZATION="").status_code, 401)
+        self.assertEqual(self.request("get", "/api/user-events-stats/").status_code, 200)
+
+class LocationAutocompleteTests(ApiTestCase):
+    def test_suggestions(self):
+        self.make_owner("o1", location="Upper West Side")
+        self.make_owner("o2", location="Upper West Side")
+        self.make_owner("o3", location="West Village")
+        location_index.index.checked_at = None
+        response = self.request("get", "/api/location-autocomplete/?q=west")
+        self.assertEqual(response.json()["results"], [
+            {"location": "West Village", "owners": 1},
+            {"location": "Upper West Side", "owners": 2},
+        ])
+        self.assertEqual(self.request("get", "/api/location-autocomplete/?q=x&limit=y").status_code, 400)
+
+class ReplicaRoutingTests(ApiTestCase):
+    def test_streamed_body_reads_from_the_view_database(self):
+        seen = []
+
+        def body():
+            seen.append(ReplicaRouter().db_for_read(User))
+            yield b"{}\n"
+
+        @use_replica
+        def view(request):
+            return StreamingHttpResponse(body())
+
+        def get_response(request):
+            return middleware.process_view(request, view, (), {}) or view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        with mock.patch("myapp.db_routing.replica_aliases", return_value=["replica_1"]):
+            response = middleware(RequestFactory().get("/"))
+            self.assertEqual(seen, [])
+            b"".join(response.streaming_content)
+        self.assertEqual(seen, ["replica_1"])
+
+    def test_streamed_queries_are_metered(self):
+        for i in range(3):
+            self.make_user(f"t{i}")
+        query_metrics.reset()
+        response = self.client.get("/api/list-users/?stream=ndjson")
+        self.assertEqual(query_metrics.snapshot(), {})
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 4)
+        response.close()
+        self.assertGreaterEqual(query_metrics.snapshot()["list_all_users"]["max_queries"], 2)
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "login:bucket:{}:{}"
+STATS_KEY = "login:stats:{}:{}"
+LOGGED_KEY = "login:logged:{}:{}"
+# a bucket's rejections are logged as a WARNING at most once per window;
+# the rest go to DEBUG and are counted in stats()
+LOG_WINDOW_SECONDS = 60
+SCOPES = ("ip", "username")
+
+
+def _cache():
+    return caches[getattr(settings, "LOGIN_THROTTLE_CACHE_ALIAS", "default")]
+
+
+def _bump(cache, key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+# BUCKET STORES
+class CacheTokenBuckets:
+    """
+    Token buckets kept in a Django cache as (tokens, last_refill). The
+    read-modify-write is serialised per process; across processes sharing
+    a cache two racing attempts may both get the last token, which is an
+    acceptable overshoot for flood protection. Point
+    LOGIN_THROTTLE_BACKEND at a store with an atomic take() (e.g. a Redis
+    script) if that matters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, now=None):
+        """Spend one token. Returns 0 when allowed, else seconds until one is free."""
+        cache = _cache()
+        now = time.time() if now is None else now
+        timeout = math.ceil(capacity / per_second) + 1  # a full bucket needs no state
+        with self._lock:
+            tokens, stamp = cache.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + max(now - stamp, 0) * per_second)
+            if tokens >= 1:
+                cache.set(key, (tokens - 1, now), timeout)
+                return 0.0
+            cache.set(key, (tokens, now), timeout)
+            return (1 - tokens) / per_second
+
+
+_store = None
+_store_path = None
+
+
+def get_store():
+    global _store, _store_path
+    path = getattr(settings, "LOGIN_THROTTLE_BACKEND", "myapp.throttling.CacheTokenBuckets")
+    if _store is None or path != _store_path:
+        _store, _store_path = import_string(path)(), path
+    return _store
+
+
+# METRICS
+def stats():
+    cache = _cache()
+    return {
+        scope: {
+            outcome: cache.get(STATS_KEY.format(scope, outcome), 0)
+            for outcome in ("allowed", "rejected")
+        }
+        for scope in SCOPES
+    }
+
+
+# LOGIN BUCKETS
+def take_login_token(scope, ident, path=""):
+    """Spend a token from the scope's bucket for ident; 0 if allowed, else seconds to wait."""
+    if not ident or not getattr(settings, "LOGIN_THROTTLE_ENABLED", True):
+        return 0
+    burst, per_minute = settings.LOGIN_THROTTLE_RATES[scope]
+    digest = hashlib.sha1(ident.encode()).hexdigest()
+    wait = get_store().take(BUCKET_KEY.format(scope, digest), burst, per_minute / 60)
+
+    cache = _cache()
+    if wait:
+        _bump(cache, STATS_KEY.format(scope, "rejected"))
+        if cache.add(LOGGED_KEY.format(scope, digest), 1, LOG_WINDOW_SECONDS):
+            logger.warning(
+                "login throttled by %s bucket on %s; repeats for this bucket are logged at DEBUG for %ss",
+                scope, path, LOG_WINDOW_SECONDS,
+            )
+        else:
+            logger.debug("login throttled by %s bucket on %s", scope, path)
+        return wait
+    _bump(cache, STATS_KEY.format(scope, "allowed"))
+    return 0
+
+
+# DRF THROTTLES
+class LoginThrottle(BaseThrottle):
+    """
+    Token bucket checked by DRF before the view runs, so a rejected login
+    never reaches authenticate() and its password hash. LOGIN_THROTTLE_RATES
+    maps scope -> (burst, refill per minute).
+    """
+
+    scope = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.retry_after = take_login_token(self.scope, self.get_ident_key(request), request.path)
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginIPThrottle(LoginThrottle):
+    scope = "ip"
+
+    def get_ident_key(self, request):
+        # REMOTE_ADDR, or the X-Forwarded-For entry the last of
+        # REST_FRAMEWORK["NUM_PROXIES"] proxies added; never a client-chosen one
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(LoginThrottle):
+    scope = "username"
+
+    def get_ident_key(self, request):
+        return username_ident(request.data)
+
+
+def username_ident(data):
+    username = data.get("username") if hasattr(data, "get") else None
+    return str(username).strip().lower() if username else None
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginUsernameThrottle]
+
+
+def login_wait(request, data):
+    """Both buckets for a plain Django request (the async views); 0 if allowed."""
+    return max(
+        take_login_token("ip", LoginIPThrottle().get_ident(request), request.path),
+        take_login_token("username", username_ident(data), request.path),
+    )
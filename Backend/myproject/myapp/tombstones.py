@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OwnerTombstone
+
+_pending = ContextVar("owner_tombstones_pending", default=None)
+
+
+def retention():
+    return timedelta(days=getattr(settings, "RECOMMEND_TOMBSTONE_DAYS", 7))
+
+
+# WRITES
+@contextmanager
+def deferred():
+    """
+    Collect the owners deleted inside the block and write their tombstones
+    at the end with one INSERT, like admin_stats.deferred does for the
+    counters. Use it around deletes that can cascade to many owners.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    token = _pending.set([])
+    try:
+        yield
+        pks = _pending.get()
+    finally:
+        _pending.reset(token)
+    write(pks)
+
+
+def owner_deleted(pk):
+    pending = _pending.get()
+    if pending is not None:
+        pending.append(pk)
+    else:
+        write([pk])
+
+
+def write(pks):
+    """Insert the tombstones and prune the expired ones, in the caller's transaction."""
+    if not pks:
+        return
+    OwnerTombstone.objects.bulk_create([OwnerTombstone(owner_id=pk) for pk in pks])
+    OwnerTombstone.objects.filter(deleted_at__lt=timezone.now() - retention()).delete()
+
+
+# READS
+def deleted_since(when):
+    """Owner ids deleted at or after when (rows older than retention() are gone)."""
+    return list(OwnerTombstone.objects.filter(deleted_at__gte=when).values_list("owner_id", flat=True))
@@ -1,24 +1,49 @@
 from django.urls import path
-from .view.auth_views import register_user, login_user, user_detail_crud, register_admin, login_admin, list_all_users
-from .view.owner_views import owner_register, owner_login, get_owner_profile, get_all_owners
-from .view.tenant_views import tenant_register, tenant_login, get_tenant_profile, get_all_tenants
+from .lazy_views import lazy_views
+
+# view modules (and DRF, simplejwt, numpy behind them) are imported on the
+# first request to one of their routes, not when a worker boots
+auth = lazy_views("myapp.view.auth_views")
+owner = lazy_views("myapp.view.owner_views")
+tenant = lazy_views("myapp.view.tenant_views")
 
 urlpatterns = [
-    path('login/', login_admin),
-    path('register/', register_admin),
+    path('login/', auth("login_admin"), name='login_admin'),
+    path('register/', auth("register_admin"), name='register_admin'),
 
-    path('login-user/', login_user),
-    path('register-user/', register_user),
-    path('list-users/', list_all_users),
-    path('list/<int:user_id>', user_detail_crud),
+    path('login-user/', auth("login_user"), name='login_user'),
+    path('register-user/', auth("register_user"), name='register_user'),
+    path('login-async/', auth("alogin_admin", is_async=True), name='alogin_admin'),
+    path('register-async/', auth("aregister_admin", is_async=True), name='aregister_admin'),
+    path('login-user-async/', auth("alogin_user", is_async=True), name='alogin_user'),
+    path('register-user-async/', auth("aregister_user", is_async=True), name='aregister_user'),
+    path('list-users/', auth("list_all_users"), name='list_all_users'),
+    path('list-owners/', auth("list_owners"), name='list_owners'),
+    path('list-tenants/', auth("list_tenants"), name='list_tenants'),
+    path('list/<int:user_id>', auth("user_detail_crud"), name='user_detail_crud'),
+    path('batch-update-users/', auth("batch_update_users"), name='batch_update_users'),
+    path('batch-delete-users/', auth("batch_delete_users"), name='batch_delete_users'),
+    path('bulk-import-users/', auth("bulk_import_users"), name='bulk_import_users'),
+    path('export-<str:kind>/', auth("export_data"), name='export_data'),
+    path('admin-stats/', auth("admin_stats_view"), name='admin_stats'),
+    path('user-events-ticket/', auth("user_events_ticket"), name='user_events_ticket'),
+    path('user-events/', auth("user_events", is_async=True), name='user_events'),
+    path('user-events-stats/', auth("user_events_stats"), name='user_events_stats'),
+    path('cache-stats/', auth("cache_stats"), name='cache_stats'),
+    path('query-metrics/', auth("query_metrics_view"), name='query_metrics'),
+    path('login-throttle-stats/', auth("login_throttle_stats"), name='login_throttle_stats'),
 
-    path('owner-register/', owner_register),
-    path('owner-login/', owner_login),
-    path('owner-profile/', get_owner_profile),
-    path('all-owners/', get_all_owners),
+    path('owner-register/', owner("owner_register"), name='owner_register'),
+    path('owner-login/', owner("owner_login"), name='owner_login'),
+    path('owner-profile/', owner("get_owner_profile"), name='get_owner_profile'),
+    path('all-owners/', owner("get_all_owners"), name='get_all_owners'),
+    path('search-owners/', owner("search_owners"), name='search_owners'),
+    path('nearby-owners/', owner("nearby_owners"), name='nearby_owners'),
+    path('location-autocomplete/', owner("location_autocomplete"), name='location_autocomplete'),
 
-    path('tenant-register/', tenant_register),
-    path('tenant-login/', tenant_login),
-    path('tenant-profile/', get_tenant_profile),
-    path('all-tenants/', get_all_tenants),
+    path('tenant-register/', tenant("tenant_register"), name='tenant_register'),
+    path('tenant-login/', tenant("tenant_login"), name='tenant_login'),
+    path('tenant-profile/', tenant("get_tenant_profile"), name='get_tenant_profile'),
+    path('all-tenants/', tenant("get_all_tenants"), name='get_all_tenants'),
+    path('recommend-owners/', tenant("recommend_owners"), name='recommend_owners'),
 ]
@@ -0,0 +1,105 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .pagination import CREATED, KeysetOrder
+from .query_utils import prefix_q
+
+ROLES = ("admin", "owner", "tenant")
+
+SORTS = {
+    "created_at": CREATED,
+    "-created_at": KeysetOrder("created_at", descending=True, parse=parse_datetime),
+    "username": KeysetOrder("username", unique=True),
+    "-username": KeysetOrder("username", descending=True, unique=True),
+    "email": KeysetOrder("email"),
+    "-email": KeysetOrder("email", descending=True),
+}
+
+# range filters, by the column they scan
+RANGE_PARAMS = {
+    "created_at": ("created_after", "created_before"),
+    "username": ("username_prefix",),
+    "email": ("email_prefix",),
+}
+
+# sort column -> equality filters that an index on User.Meta puts in front
+# of it, e.g. ("role",) under "created_at" is (role, created_at, id).
+# Anything else would filter or sort outside an index, so it is refused.
+INDEXED_PLANS = {
+    "created_at": {(), ("role",), ("phone",)},
+    "username": {(), ("role",)},
+    "email": {(), ("role",)},
+}
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _parse_when(name, value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise InvalidFilter(f"{name} must be an ISO date or datetime")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _plans_help():
+    plans = []
+    for column, equalities in INDEXED_PLANS.items():
+        for equality in sorted(equalities):
+            plans.append("+".join(equality + (f"sort={column}",)))
+    return ", ".join(plans)
+
+
+def filter_users(queryset, params, role=None):
+    """
+    Apply the admin list filters in params to queryset and return
+    (queryset, KeysetOrder). role is set by endpoints that already fix it.
+
+    Filters: role, phone (exact), created_after/created_before,
+    username_prefix, email_prefix. Sort: ?sort=[-]created_at|username|email,
+    defaulting to the column of whichever range filter is used.
+    """
+    equal = {}
+    if role is not None:
+        if params.get("role", role) != role:
+            raise InvalidFilter(f"role is fixed to {role} on this endpoint")
+        equal["role"] = role
+    elif params.get("role"):
+        if params["role"] not in ROLES:
+            raise InvalidFilter(f"role must be one of {', '.join(ROLES)}")
+        equal["role"] = params["role"]
+    if params.get("phone"):
+        equal["phone"] = params["phone"]
+
+    ranged = [column for column, names in RANGE_PARAMS.items() if any(params.get(n) for n in names)]
+    if len(ranged) > 1:
+        raise InvalidFilter("Only one of created_after/created_before, username_prefix or email_prefix can be used at a time")
+
+    sort = params.get("sort") or (ranged[0] if ranged else "created_at")
+    order = SORTS.get(sort)
+    if order is None:
+        raise InvalidFilter(f"sort must be one of {', '.join(SORTS)}")
+    if ranged and ranged[0] != order.column:
+        raise InvalidFilter(f"A {ranged[0]} filter can only be sorted by {ranged[0]}")
+    if tuple(sorted(equal)) not in INDEXED_PLANS[order.column]:
+        raise InvalidFilter(f"Unsupported filter/sort combination; use one of: {_plans_help()}")
+
+    # the role filter of list_owners/list_tenants is already on the queryset
+    queryset = queryset.filter(**{k: v for k, v in equal.items() if k != "role" or role is None})
+    if params.get("created_after"):
+        queryset = queryset.filter(created_at__gte=_parse_when("created_after", params["created_after"]))
+    if params.get("created_before"):
+        queryset = queryset.filter(created_at__lt=_parse_when("created_before", params["created_before"]))
+    if params.get("username_prefix"):
+        queryset = queryset.filter(prefix_q("username", params["username_prefix"]))
+    if params.get("email_prefix"):
+        queryset = queryset.filter(prefix_q("email", params["email_prefix"]))
+    return queryset, order
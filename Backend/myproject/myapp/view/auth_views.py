@@ -1,10 +1,36 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.db import IntegrityError, transaction
-from rest_framework.decorators import api_view, permission_classes
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, BasePermission
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from .. import admin_stats, events, response_cache
+from ..authentication import ClaimsJWTAuthentication, current_user_claims
+from ..batch_users import BatchError, ProtectedUsers, delete_users, parse_ids, parse_patches, update_users
+from ..bulk_import import ImportFormatError, detect_format, import_users, parse_rows
+from ..conditional import add_validators, list_seed, make_etag, not_modified, record_validators
+from ..db_routing import use_replica
+from ..export import CONTENT_TYPES, export_response
+from ..fieldsets import InvalidFields, select_fields
+from ..hashing import acheck_password, amake_password
+from ..models import Owner, Tenant
+from ..pagination import InvalidCursor, keyset_page, ndjson_response, wants_stream
+from .. import query_metrics
+from ..query_metrics import query_budget
+from .. import throttling
+from ..throttling import LOGIN_THROTTLES
+from ..user_filters import InvalidFilter, filter_users
 
 User = get_user_model()
 
@@ -12,9 +38,28 @@ User = get_user_model()
 # JWT TOKENS
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
+    # read back by ClaimsJWTAuthentication so role checks skip the User lookup
+    refresh["role"] = getattr(user, "role", "")
+    refresh["is_staff"] = user.is_staff
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
 
 
+# ROLE LOGIN
+def authenticate_with_profile(username, password, profile):
+    """
+    authenticate() for the owner/tenant logins, with the role's profile
+    (a reverse one-to-one such as "owner_profile") joined into the same
+    SELECT, so checking the role costs no second query.
+    """
+    user = User.objects.select_related(profile).filter(**{User.USERNAME_FIELD: username}).first()
+    if user is None:
+        User().set_password(password)  # same cost as a real check, like ModelBackend
+        return None
+    if not user.check_password(password) or not user.is_active:
+        return None
+    return user
+
+
 # PERMISSIONS
 class IsAdminRole(BasePermission):
     """
@@ -29,6 +74,8 @@ class IsAdminRole(BasePermission):
 
 
 # OWNER/TENANT REGISTER 
+# create + role save, each followed by an admin stats counter write
+@query_budget(5)
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def register_user(request):
@@ -73,8 +120,10 @@ def register_user(request):
 
 
 # OWNER/TENANT LOGIN
+@query_budget(2)
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login_user(request):
     username = request.data.get("username")
     password = request.data.get("password")
@@ -106,6 +155,7 @@ def login_user(request):
 
 
 #  ADMIN REGISTER (ONLY ONCE)
+@query_budget(6)
 @api_view(["POST"])
 @permission_classes([AllowAny])  # so first admin can be created without token
 def register_admin(request):
@@ -126,16 +176,12 @@ def register_admin(request):
             if User.objects.select_for_update().filter(role="admin").exists():
                 return Response({"error": "Admin already exists"}, status=400)
 
-            admin = User.objects.create_user(username=username, email=email, password=password)
-            admin.role = "admin"
-            admin.address = address
-            admin.phone = str(phone)
-
-            # Optional: make it Django admin capable
-            admin.is_staff = True
-            admin.is_superuser = True
-
-            admin.save()
+            # one INSERT, so the stats counters are written once
+            admin = User.objects.create_user(
+                username=username, email=email, password=password,
+                role="admin", address=address, phone=str(phone),
+                is_staff=True, is_superuser=True,  # Django admin capable
+            )
 
         tokens = get_tokens_for_user(admin)
 
@@ -149,8 +195,10 @@ def register_admin(request):
 
 
 # ADMIN LOGIN
+@query_budget(2)
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login_admin(request):
     username = request.data.get("username")
     password = request.data.get("password")
@@ -180,60 +228,252 @@ def login_admin(request):
     )
 
 
-#  ADMIN: LIST ALL USERS @api_view(["GET"])
+# ASYNC (ASGI) LOGIN/REGISTER
+# Same contracts as the DRF views above, as native async views: lookups use
+# the async ORM and PBKDF2 runs in hashing.get_pool(), so under ASGI a login
+# never blocks the event loop. JSON bodies only.
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _throttled(wait):
+    seconds = math.ceil(wait)
+    response = JsonResponse({"detail": f"Request was throttled. Expected available in {seconds} seconds."}, status=429)
+    response["Retry-After"] = str(seconds)
+    return response
+
+
+async def _aauthenticate(username, password):
+    user = await User.objects.filter(**{User.USERNAME_FIELD: username}).afirst()
+    if user is None:
+        await amake_password(password)  # same cost as a real check, like ModelBackend
+        return None
+    valid, new_hash = await acheck_password(password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if new_hash:
+        user.password = new_hash
+        await user.asave(update_fields=["password"])
+    return user
+
+
+async def _alogin(request, admin):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    wait = await sync_to_async(throttling.login_wait)(request, data)
+    if wait:
+        return _throttled(wait)
+
+    username = data.get("username")
+    password = data.get("password")
+    if not username or not password:
+        return JsonResponse({"error": "username and password are required"}, status=400)
+
+    user = await _aauthenticate(username, password)
+    if not user:
+        return JsonResponse({"error": "Invalid credentials"}, status=401)
+
+    if admin and user.role != "admin":
+        return JsonResponse({"error": "Not an admin account"}, status=403)
+    if not admin and user.role == "admin":
+        return JsonResponse({"error": "Use admin login endpoint"}, status=403)
+
+    return JsonResponse(
+        {
+            "message": "Admin login successful" if admin else "Login successful",
+            "tokens": get_tokens_for_user(user),
+            "role": user.role,
+            "user_id": user.id,
+            "username": user.username,
+        },
+        status=200,
+    )
+
+
+@query_budget(2)
+@csrf_exempt
+@require_POST
+async def alogin_user(request):
+    return await _alogin(request, admin=False)
+
+
+@query_budget(2)
+@csrf_exempt
+@require_POST
+async def alogin_admin(request):
+    return await _alogin(request, admin=True)
+
+
+def _user_fields(data, password_hash):
+    return {
+        "username": User.normalize_username(data["username"]),
+        "email": User.objects.normalize_email(data.get("email")),
+        "password": password_hash,
+        "address": data.get("address", ""),
+        "phone": str(data.get("phone", "")),
+    }
+
+
+@query_budget(3)
+@csrf_exempt
+@require_POST
+async def aregister_user(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not data.get("username") or not data.get("password"):
+        return JsonResponse({"error": "username and password are required"}, status=400)
+
+    role = data.get("role")
+    if role not in ["owner", "tenant"]:
+        return JsonResponse({"error": "role must be owner/tenant"}, status=400)
+
+    fields = _user_fields(data, await amake_password(data["password"]))
+    try:
+        user = await User.objects.acreate(role=role, **fields)
+    except IntegrityError:
+        return JsonResponse({"error": "Username or email already exists"}, status=400)
+
+    return JsonResponse(
+        {
+            "message": "User registered",
+            "tokens": get_tokens_for_user(user),
+            "role": user.role,
+            "user_id": user.id,
+            "username": user.username,
+        },
+        status=201,
+    )
+
+
+def _create_first_admin(fields):
+    with transaction.atomic():
+        if User.objects.select_for_update().filter(role="admin").exists():
+            return None
+        return User.objects.create(role="admin", is_staff=True, is_superuser=True, **fields)
+
+
+@query_budget(6)
+@csrf_exempt
+@require_POST
+async def aregister_admin(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not data.get("username") or not data.get("password"):
+        return JsonResponse({"error": "username and password are required"}, status=400)
+
+    # the async ORM has no transactions, so the admin check runs in one sync block
+    fields = _user_fields(data, await amake_password(data["password"]))
+    try:
+        admin = await sync_to_async(_create_first_admin)(fields)
+    except IntegrityError:
+        return JsonResponse({"error": "Username or email already exists"}, status=400)
+    if admin is None:
+        return JsonResponse({"error": "Admin already exists"}, status=400)
+
+    return JsonResponse(
+        {"message": "Admin registered", "tokens": get_tokens_for_user(admin), "user_id": admin.id, "role": admin.role},
+        status=201,
+    )
+
+
+USER_LIST_FIELDS = ("id", "username", "email", "role", "address", "phone", "created_at")
+
+
+def _user_list_response(request, queryset, role=None):
+    try:
+        fields = select_fields(request, "user", USER_LIST_FIELDS)
+        queryset, order = filter_users(queryset, request.query_params, role=role)
+    except (InvalidFields, InvalidFilter) as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    if wants_stream(request):
+        return ndjson_response(queryset, fields, order=order)
+
+    etag = make_etag(request, list_seed(queryset))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    try:
+        rows, next_cursor = keyset_page(queryset, fields, request, order)
+    except InvalidCursor as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    response = Response({"results": rows, "next": next_cursor}, status=200)
+    return add_validators(response, etag)
+
+
+#  ADMIN: LIST ALL USERS
+@query_budget(3)
+@use_replica
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAdminRole])
 def list_all_users(request):
-    users = (
-        User.objects.all()
-        .values("id", "username", "email", "role", "address", "phone", "created_at")
-    )
-    return Response(list(users), status=200)
+    return _user_list_response(request, User.objects.all())
 
 
 # ADMIN: LIST OWNERS
+@query_budget(3)
+@use_replica
 @api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAdminRole])
 def list_owners(request):
-    owners = (
-        User.objects.filter(role="owner")
-        .values("id", "username", "email", "role", "address", "phone", "created_at")
-    )
-    return Response(list(owners), status=200)
+    return _user_list_response(request, User.objects.filter(role="owner"), role="owner")
 
 
-# ADMIN: LIST TENANTS @api_view(["GET"])
+# ADMIN: LIST TENANTS
+@query_budget(3)
+@use_replica
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAdminRole])
 def list_tenants(request):
-    tenants = (
-        User.objects.filter(role="tenant")
-        .values("id", "username", "email", "role", "address", "phone", "created_at")
-    )
-    return Response(list(tenants), status=200)
+    return _user_list_response(request, User.objects.filter(role="tenant"), role="tenant")
 
 
 # ADMIN: USER DETAIL CRUD
+# a delete cascades to the owner/tenant profile and the owner's search postings,
+# writes the admin stats counters once and leaves the owner's tombstone
+@query_budget(15)
+@use_replica
 @api_view(["GET", "PUT", "DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAdminRole])
 def user_detail_crud(request, user_id):
+    if request.method == "GET":
+        try:
+            fields = select_fields(request, "user", USER_LIST_FIELDS)
+        except InvalidFields as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        row = User.objects.filter(id=user_id).values("id", "updated_at", *fields).first()
+        if row is None:
+            return Response({"error": "User not found"}, status=404)
+
+        seed, last_modified = record_validators(row["id"], row["updated_at"])
+        etag = make_etag(request, seed)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        response = Response({f: row[f] for f in fields}, status=200)
+        return add_validators(response, etag, last_modified)
+
     try:
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
 
-    if request.method == "GET":
-        return Response(
-            {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "role": user.role,
-                "address": user.address,
-                "phone": user.phone,
-                "created_at": user.created_at,
-            },
-            status=200,
-        )
-
     if request.method == "PUT":
         data = request.data
 
@@ -259,5 +499,205 @@ def user_detail_crud(request, user_id):
     if user.role == "admin":
         return Response({"error": "Admin user cannot be deleted"}, status=403)
 
-    user.delete()
-    return Response({"message": "User deleted"}, status=200)
\ No newline at end of file
+    with admin_stats.deferred():  # one counter write for the user and its profile
+        user.delete()
+    return Response({"message": "User deleted"}, status=200)
+
+
+# ADMIN: BATCH UPDATE  {"users": [{"id": 1, "email": ..., "role": ...}, ...]}
+@query_budget(7)
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def batch_update_users(request):
+    try:
+        patches = parse_patches(request.data.get("users") if hasattr(request.data, "get") else None)
+    except BatchError as exc:
+        return Response({"error": str(exc)}, status=400)
+    return Response(update_users(patches), status=200)
+
+
+# ADMIN: BATCH DELETE  {"ids": [1, 2, 3]}
+@query_budget(18)
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def batch_delete_users(request):
+    try:
+        ids = parse_ids(request.data.get("ids") if hasattr(request.data, "get") else None)
+        return Response(delete_users(ids), status=200)
+    except ProtectedUsers as exc:
+        return Response({"error": str(exc)}, status=403)
+    except BatchError as exc:
+        return Response({"error": str(exc)}, status=400)
+
+
+# ADMIN: BULK IMPORT OWNERS/TENANTS (CSV or NDJSON)
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def bulk_import_users(request):
+    content_type = request.content_type or ""
+    if content_type.startswith("multipart/form-data"):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=400)
+        fmt = detect_format(upload.content_type, upload.name)
+        raw = upload.read()
+    else:
+        fmt = detect_format(content_type)
+        raw = request.body
+
+    fmt = request.query_params.get("input", fmt)
+    try:
+        rows = parse_rows(raw, fmt)
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    max_rows = getattr(settings, "BULK_IMPORT_MAX_ROWS", 10000)
+    if len(rows) > max_rows:
+        return Response({"error": f"at most {max_rows} rows per import"}, status=400)
+
+    report = import_users(rows)
+    return Response(report, status=201 if report["created"] else 400)
+
+
+# ADMIN: STREAMING EXPORT
+EXPORTS = {
+    "users": (lambda: User.objects.all(), USER_LIST_FIELDS),
+    "owners": (
+        lambda: Owner.objects.all(),
+        ("id", "address", "phone", "location", "latitude", "longitude", "created_at", "updated_at"),
+    ),
+    "tenants": (
+        lambda: Tenant.objects.all(),
+        ("id", "address", "phone", "location", "created_at", "updated_at"),
+    ),
+}
+
+
+@query_budget(2)
+@use_replica
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def export_data(request, kind):
+    if kind not in EXPORTS:
+        return Response({"error": "Unknown export"}, status=404)
+
+    output = request.query_params.get("output", "csv")
+    if output not in CONTENT_TYPES:
+        return Response({"error": "output must be csv/ndjson"}, status=400)
+
+    gzip = request.query_params.get("gzip") in ("1", "true")
+    queryset, fields = EXPORTS[kind]
+    return export_response(queryset(), fields, output=output, gzip=gzip, filename=kind)
+
+
+# ADMIN: DASHBOARD STATS  ?days=30&locations=20
+@query_budget(3)
+@use_replica
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def admin_stats_view(request):
+    try:
+        days = int(request.query_params.get("days", admin_stats.DEFAULT_DAYS))
+        locations = int(request.query_params.get("locations", admin_stats.DEFAULT_LOCATIONS))
+    except ValueError:
+        return Response({"error": "days and locations must be integers"}, status=400)
+    if not 1 <= days <= admin_stats.MAX_DAYS or not 0 <= locations <= admin_stats.MAX_LOCATIONS:
+        return Response(
+            {"error": f"days must be 1-{admin_stats.MAX_DAYS} and locations 0-{admin_stats.MAX_LOCATIONS}"},
+            status=400,
+        )
+    return Response(admin_stats.snapshot(days=days, locations=locations), status=200)
+
+
+# ADMIN: LIST RESPONSE CACHE STATS
+@query_budget(1)
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def cache_stats(request):
+    return Response(response_cache.stats(), status=200)
+
+
+# ADMIN: LOGIN THROTTLE COUNTERS
+@query_budget(1)
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def login_throttle_stats(request):
+    return Response(throttling.stats(), status=200)
+
+
+# ADMIN: PER-ENDPOINT QUERY/LATENCY METRICS
+@query_budget(1)
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def query_metrics_view(request):
+    return Response(query_metrics.snapshot(), status=200)
+
+
+# ADMIN: ONE-TIME TICKET FOR user-events/
+@query_budget(1)
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def user_events_ticket(request):
+    return Response(
+        {"ticket": events.issue_ticket(request.user.id), "expires_in": getattr(settings, "EVENTS_TICKET_SECONDS", 30)},
+        status=201,
+    )
+
+
+# ADMIN: LIVE USER/OWNER/TENANT EVENTS (server-sent events)
+# EventSource cannot set headers, so a browser opens the stream with
+# ?ticket= from user-events-ticket/ and resumes with ?last_event_id=.
+# ?follow=0 returns just the replay; under WSGI that is all a request
+# gets, since a live stream would hold a worker thread for its lifetime.
+async def _stream_role(request):
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        authenticator = ClaimsJWTAuthentication()
+        token = authenticator.get_validated_token(header[len("Bearer "):].encode())
+        user = await sync_to_async(authenticator.get_user)(token)
+        return user.role
+    ticket = request.GET.get("ticket")
+    if not ticket:
+        raise AuthenticationFailed("Authentication credentials were not provided.")
+    user_id = await events.aredeem_ticket(ticket)
+    claims = await sync_to_async(current_user_claims)(user_id) if user_id is not None else None
+    if claims is None:
+        raise AuthenticationFailed("Invalid or expired ticket.")
+    return claims[0]
+
+
+@query_budget(1)
+@require_GET
+async def user_events(request):
+    try:
+        role = await _stream_role(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({"error": str(exc.detail)}, status=401)
+    if role != "admin":
+        return JsonResponse({"error": "Admin role required"}, status=403)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    follow = request.GET.get("follow") not in ("0", "false") and isinstance(request, ASGIRequest)
+    content = events.stream(last_event_id) if follow else events.replay(last_event_id)
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx would otherwise hold events back
+    return response
+
+
+# ADMIN: EVENT BUS STATS
+@query_budget(1)
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAdminRole])
+def user_events_stats(request):
+    return Response(events.bus.stats(), status=200)
@@ -1,20 +1,33 @@
-from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from rest_framework.decorators import api_view, permission_classes
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from .auth_views import authenticate_with_profile, get_tokens_for_user
+from ..authentication import ClaimsJWTAuthentication
+from ..db_routing import use_replica
+from ..query_metrics import query_budget
+from ..throttling import LOGIN_THROTTLES
 from ..models import Owner
 from ..serializers import OwnerSerializer
+from ..fast_serializers import owner_fast
+from ..conditional import add_validators, list_seed, make_etag, not_modified, record_validators
+from .. import admin_stats, location_index, response_cache
+from ..pagination import get_page_size
+from ..search import search_owner_ids
+from ..geo import owners_in_bbox, owners_within_radius
+from ..fieldsets import OWNER_FIELDS, InvalidFields, select_fields
 
+User = get_user_model()
 
 
-def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
-    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+def _profile_data(profile):
+    data = OwnerSerializer(profile).data
+    return {f: data[f] for f in OWNER_FIELDS}
 
 
+@query_budget(7)
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def owner_register(request):
@@ -28,24 +41,40 @@ def owner_register(request):
     if not username or not password:
         return Response({"detail": "username and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if User.objects.filter(username=username).exists():
+    try:
+        # the user and the profile share one stats counter write
+        with transaction.atomic(), admin_stats.deferred():
+            user = User.objects.create_user(
+                username=username, password=password, email=email,
+                role="owner", phone=str(phone or ""), address=address or "",
+            )
+            profile = Owner.objects.create(
+                user=user, phone=str(phone or ""), address=address or "", location=data.get("location") or "",
+            )
+    except IntegrityError:
         return Response({"detail": "Username already exists."}, status=status.HTTP_400_BAD_REQUEST)
 
-    user = User.objects.create_user(username=username, password=password, email=email)
-    Owner.objects.create(user=user, phone=phone, address=address)
-
     tokens = get_tokens_for_user(user)
-    return Response({"detail": "Owner registered successfully.", "tokens": tokens}, status=status.HTTP_201_CREATED)
+    return Response(
+        {"detail": "Owner registered successfully.", "tokens": tokens, "profile": _profile_data(profile)},
+        status=status.HTTP_201_CREATED,
+    )
 
 
+@query_budget(2)
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def owner_login(request):
     data = request.data
     username = data.get("username")
     password = data.get("password")
 
-    user = authenticate(username=username, password=password)
+    if not username or not password:
+        return Response({"detail": "username and password are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # one query: the user and its owner profile
+    user = authenticate_with_profile(username, password, "owner_profile")
     if user is None:
         return Response({"detail": "Invalid username or password."}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -54,24 +83,160 @@ def owner_login(request):
         return Response({"detail": "This account is not an owner."}, status=status.HTTP_403_FORBIDDEN)
 
     tokens = get_tokens_for_user(user)
-    return Response({"detail": "Owner login success.", "tokens": tokens}, status=status.HTTP_200_OK)
+    return Response(
+        {"detail": "Owner login success.", "tokens": tokens, "profile": _profile_data(user.owner_profile)},
+        status=status.HTTP_200_OK,
+    )
 
 
+@query_budget(2)
+@use_replica
 @api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_owner_profile(request):
-    if not hasattr(request.user, "owner_profile"):
+    try:
+        fields = select_fields(request, "owner", OWNER_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # the user comes from the token claims, so the profile is the only row
+    # read, and only the requested columns of it plus the validators' ones
+    row = Owner.objects.filter(user_id=request.user.id).values_list("id", "updated_at", *fields).first()
+    if row is None:
         return Response({"detail": "Owner profile not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    profile = request.user.owner_profile
-    return Response(OwnerSerializer(profile).data, status=status.HTTP_200_OK)
+    seed, last_modified = record_validators(row[0], row[1])
+    etag = make_etag(request, seed)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    data = owner_fast.only(fields).row_converter()(row[2:])
+    response = Response(data, status=status.HTTP_200_OK)
+    return add_validators(response, etag, last_modified)
 
 
+@query_budget(3)
+@use_replica
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_all_owners(request):
     if not request.user.is_staff:
         return Response({"detail": "Admin only."}, status=status.HTTP_403_FORBIDDEN)
-
-    owners = Owner.objects.all().order_by("-id")
-    return Response(OwnerSerializer(owners, many=True).data, status=status.HTTP_200_OK)
+    try:
+        fields = select_fields(request, "owner", OWNER_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    etag = make_etag(request, list_seed(Owner.objects.all()))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    data, hit = response_cache.cached_data(
+        "owners", request,
+        lambda: owner_fast.only(fields).serialize(Owner.objects.order_by("-id")),
+    )
+    response = response_cache.mark(Response(data, status=status.HTTP_200_OK), hit)
+    return add_validators(response, etag)
+
+
+@query_budget(3)
+@use_replica
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_owners(request):
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        fields = select_fields(request, "owner", OWNER_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        page = max(1, int(request.query_params.get("page", 1)))
+    except ValueError:
+        page = 1
+    limit = get_page_size(request)
+
+    ids, has_more = search_owner_ids(query, offset=(page - 1) * limit, limit=limit)
+    return Response(
+        {
+            "results": owner_fast.only(fields).serialize_ordered(Owner.objects.all(), ids),
+            "page": page,
+            "next": page + 1 if has_more else None,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@query_budget(4)
+@use_replica
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def location_autocomplete(request):
+    """
+    Owner locations for ?q= as it is typed, from location_index; a
+    keystroke does no database work. ?limit= caps the suggestions.
+    """
+    query = request.query_params.get("q", "")
+    if len(query) > location_index.MAX_QUERY_LENGTH:
+        return Response({"detail": "q is too long."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get("limit", location_index.DEFAULT_LIMIT))
+    except ValueError:
+        return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, location_index.MAX_LIMIT))
+
+    suggestions = location_index.suggest(query, limit) if query.strip() else []
+    return Response(
+        {"results": [{"location": location, "owners": n} for location, n in suggestions]},
+        status=status.HTTP_200_OK,
+    )
+
+
+def _float_params(params, names):
+    try:
+        return [float(params[name]) for name in names]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@query_budget(3)
+@use_replica
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def nearby_owners(request):
+    """
+    ?lat=&lon=&radius_km=  -> owners within the circle, nearest first
+    ?min_lat=&min_lon=&max_lat=&max_lon=  -> owners inside the box
+    """
+    params = request.query_params
+    limit = get_page_size(request)
+    owners = Owner.objects.exclude(geohash="")
+    try:
+        serializer = owner_fast.only(select_fields(request, "owner", OWNER_FIELDS))
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if "radius_km" in params:
+        values = _float_params(params, ("lat", "lon", "radius_km"))
+        if values is None or values[2] <= 0:
+            return Response({"detail": "lat, lon and a positive radius_km are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits = owners_within_radius(owners, *values, limit=limit)
+        distances = dict(hits)
+        results = serializer.serialize_ordered(owners, list(distances), with_ids=True)
+        for pk, row in results:
+            row["distance_km"] = round(distances[pk], 3)
+        return Response([row for _, row in results], status=status.HTTP_200_OK)
+
+    values = _float_params(params, ("min_lat", "min_lon", "max_lat", "max_lon"))
+    if values is None or values[0] > values[2] or values[1] > values[3]:
+        return Response({"detail": "Pass lat/lon/radius_km or a valid min_lat/min_lon/max_lat/max_lon box."}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = serializer.serialize(owners_in_bbox(owners, *values).order_by("-id")[:limit])
+    return Response(results, status=status.HTTP_200_OK)
@@ -1,19 +1,30 @@
-from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from rest_framework.decorators import api_view, permission_classes
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
-from ..models import Tenant
+from .auth_views import authenticate_with_profile, get_tokens_for_user
+from ..authentication import ClaimsJWTAuthentication
+from ..db_routing import use_replica
+from ..query_metrics import query_budget
+from ..throttling import LOGIN_THROTTLES
+from ..models import Owner, Tenant
 from ..serializers import TenantSerializer
+from ..fast_serializers import owner_fast, tenant_fast
+from ..conditional import add_validators, list_seed, make_etag, not_modified, record_validators
+from .. import admin_stats, response_cache
+from ..fieldsets import OWNER_FIELDS, TENANT_FIELDS, InvalidFields, select_fields
 
+User = get_user_model()
 
-def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
-    return {"refresh": str(refresh), "access": str(refresh.access_token)}
 
+def _profile_data(profile):
+    data = TenantSerializer(profile).data
+    return {f: data[f] for f in TENANT_FIELDS}
 
+
+@query_budget(6)
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def tenant_register(request):
@@ -27,24 +38,40 @@ def tenant_register(request):
     if not username or not password:
         return Response({"detail": "username and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if User.objects.filter(username=username).exists():
+    try:
+        # the user and the profile share one stats counter write
+        with transaction.atomic(), admin_stats.deferred():
+            user = User.objects.create_user(
+                username=username, password=password, email=email,
+                role="tenant", phone=str(phone or ""), address=address or "",
+            )
+            profile = Tenant.objects.create(
+                user=user, phone=str(phone or ""), address=address or "", location=data.get("location") or "",
+            )
+    except IntegrityError:
         return Response({"detail": "Username already exists."}, status=status.HTTP_400_BAD_REQUEST)
 
-    user = User.objects.create_user(username=username, password=password, email=email)
-    Tenant.objects.create(user=user, phone=phone, address=address)
-
     tokens = get_tokens_for_user(user)
-    return Response({"detail": "Tenant registered successfully.", "tokens": tokens}, status=status.HTTP_201_CREATED)
+    return Response(
+        {"detail": "Tenant registered successfully.", "tokens": tokens, "profile": _profile_data(profile)},
+        status=status.HTTP_201_CREATED,
+    )
 
 
+@query_budget(2)
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def tenant_login(request):
     data = request.data
     username = data.get("username")
     password = data.get("password")
 
-    user = authenticate(username=username, password=password)
+    if not username or not password:
+        return Response({"detail": "username and password are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # one query: the user and its tenant profile
+    user = authenticate_with_profile(username, password, "tenant_profile")
     if user is None:
         return Response({"detail": "Invalid username or password."}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -52,24 +79,115 @@ def tenant_login(request):
         return Response({"detail": "This account is not a tenant."}, status=status.HTTP_403_FORBIDDEN)
 
     tokens = get_tokens_for_user(user)
-    return Response({"detail": "Tenant login success.", "tokens": tokens}, status=status.HTTP_200_OK)
+    return Response(
+        {"detail": "Tenant login success.", "tokens": tokens, "profile": _profile_data(user.tenant_profile)},
+        status=status.HTTP_200_OK,
+    )
 
 
+@query_budget(2)
+@use_replica
 @api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_tenant_profile(request):
-    if not hasattr(request.user, "tenant_profile"):
+    try:
+        fields = select_fields(request, "tenant", TENANT_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # the user comes from the token claims, so the profile is the only row
+    # read, and only the requested columns of it plus the validators' ones
+    row = Tenant.objects.filter(user_id=request.user.id).values_list("id", "updated_at", *fields).first()
+    if row is None:
         return Response({"detail": "Tenant profile not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    profile = request.user.tenant_profile
-    return Response(TenantSerializer(profile).data, status=status.HTTP_200_OK)
+    seed, last_modified = record_validators(row[0], row[1])
+    etag = make_etag(request, seed)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
 
+    data = tenant_fast.only(fields).row_converter()(row[2:])
+    response = Response(data, status=status.HTTP_200_OK)
+    return add_validators(response, etag, last_modified)
 
+
+@query_budget(3)
+@use_replica
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_all_tenants(request):
     if not request.user.is_staff:
         return Response({"detail": "Admin only."}, status=status.HTTP_403_FORBIDDEN)
-
-    tenants = Tenant.objects.all().order_by("-id")
-    return Response(TenantSerializer(tenants, many=True).data, status=status.HTTP_200_OK)
+    try:
+        fields = select_fields(request, "tenant", TENANT_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    etag = make_etag(request, list_seed(Tenant.objects.all()))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    data, hit = response_cache.cached_data(
+        "tenants", request,
+        lambda: tenant_fast.only(fields).serialize(Tenant.objects.order_by("-id")),
+    )
+    response = response_cache.mark(Response(data, status=status.HTTP_200_OK), hit)
+    return add_validators(response, etag)
+
+
+@query_budget(5)
+@use_replica
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def recommend_owners(request):
+    """
+    Owners ranked for a tenant by location/address similarity, distance
+    (when ?lat=&lon= is given) and freshness.
+    ?tenant_id= (admin only) or the caller's own tenant profile;
+    ?location= scores an ad-hoc location instead. ?k= caps the results.
+    """
+    # imported here so the other tenant routes load without numpy
+    from .. import recommendations
+
+    params = request.query_params
+    try:
+        fields = select_fields(request, "owner", OWNER_FIELDS)
+    except InvalidFields as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        k = max(1, min(int(params.get("k", recommendations.DEFAULT_K)), recommendations.MAX_K))
+        lat = float(params["lat"]) if "lat" in params else None
+        lon = float(params["lon"]) if "lon" in params else None
+    except ValueError:
+        return Response({"detail": "k, lat and lon must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+
+    location, address = params.get("location", ""), ""
+    if not location:
+        if "tenant_id" in params:
+            if not request.user.is_staff:
+                return Response({"detail": "Admin only."}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                tenant_id = int(params["tenant_id"])
+            except ValueError:
+                tenant_id = 0
+            if tenant_id < 1:
+                return Response({"detail": "tenant_id must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+            tenant = Tenant.objects.filter(id=tenant_id).values("location", "address").first()
+            if tenant is None:
+                return Response({"detail": "Tenant not found."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            tenant = Tenant.objects.filter(user_id=request.user.id).values("location", "address").first()
+            if tenant is None:
+                return Response({"detail": "Pass location or tenant_id."}, status=status.HTTP_400_BAD_REQUEST)
+        location, address = tenant["location"], tenant["address"]
+
+    hits = recommendations.recommend(location, address, lat=lat, lon=lon, k=k)
+    scores = dict(hits)
+    results = owner_fast.only(fields).serialize_ordered(Owner.objects.all(), list(scores), with_ids=True)
+    for pk, row in results:
+        row["score"] = round(scores[pk], 4)
+    return Response([row for _, row in results], status=status.HTTP_200_OK)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_asgi_application()
+
+# build the location autocomplete index now rather than on the first request
+from myapp import location_index  # noqa: E402
+
+location_index.warm()
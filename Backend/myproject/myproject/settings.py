@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+import importlib.util
 import os
 from corsheaders.defaults import default_headers
 
@@ -50,6 +51,54 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7)
 }
+# how long ClaimsJWTAuthentication trusts a cached role/is_active snapshot
+AUTH_CLAIMS_CACHE_SECONDS = 60
+
+# admin bulk user import (None = min(4, CPUs) hashing threads per process)
+BULK_IMPORT_MAX_ROWS = 10000
+BULK_IMPORT_HASH_WORKERS = None
+# ids/patches accepted by one batch-update-users/ or batch-delete-users/ call
+BATCH_USERS_MAX = 1000
+
+# threads hashing passwords for the async login/register views
+# (None = min(4, CPUs)); PBKDF2 releases the GIL, so they run in parallel
+AUTH_HASH_WORKERS = None
+
+# how often a worker pulls owner rows saved elsewhere into its in-memory
+# recommendation matrix (its own saves are applied on commit), how far
+# before the last sync it reads again to catch late commits and clock skew,
+# and how long owner tombstones are kept for it (a worker that has not
+# synced for that long reloads the matrix)
+RECOMMEND_SYNC_SECONDS = 5
+RECOMMEND_SYNC_OVERLAP_SECONDS = 60
+RECOMMEND_TOMBSTONE_DAYS = 7
+
+# how often the location autocomplete index reloads from the owner_location
+# stat counters to pick up other workers (its own saves apply at once)
+LOCATION_INDEX_SYNC_SECONDS = 60
+
+# admin event stream (user-events/): events each worker keeps for
+# Last-Event-ID resume, how far a slow client may fall behind before it is
+# disconnected, the keep-alive interval, how long one connection is held
+# before the client is told to reconnect, and how long a ticket from
+# user-events-ticket/ stays valid (tickets live in the default cache; use
+# a shared one with several workers)
+EVENTS_HISTORY = 1000
+EVENTS_MAX_PENDING = 256
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_STREAM_SECONDS = 300
+EVENTS_TICKET_SECONDS = 30
+
+# token buckets checked before any password is hashed on the login views:
+# scope -> (burst, refill per minute). The buckets live in
+# LOGIN_THROTTLE_CACHE_ALIAS; use a shared cache with several workers.
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_RATES = {
+    "ip": (20, 30),
+    "username": (5, 5),
+}
+LOGIN_THROTTLE_CACHE_ALIAS = "default"
+LOGIN_THROTTLE_BACKEND = "myapp.throttling.CacheTokenBuckets"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -57,11 +106,37 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    "DEFAULT_RENDERER_CLASSES": [
+        "myapp.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "myapp.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # reverse proxies in front of the app; the client address (and so the
+    # login throttle's IP bucket) is REMOTE_ADDR, or with N proxies the Nth
+    # X-Forwarded-For entry from the right. Anything further left is
+    # client-supplied and must not be trusted.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 
+# MessagePack is negotiated through Accept / Content-Type when installed
+if importlib.util.find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"][1:1] = [
+        "myapp.renderers.MessagePackRenderer",
+        "myapp.renderers.LegacyMessagePackRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] += [
+        "myapp.parsers.MessagePackParser",
+        "myapp.parsers.LegacyMessagePackParser",
+    ]
+
 AUTH_USER_MODEL = 'myapp.User'
 
 MIDDLEWARE = [
+    "myapp.query_metrics.QueryMetricsMiddleware",  # first, so total time covers the whole stack
     "corsheaders.middleware.CorsMiddleware",  # must be near top
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,8 +145,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "corsheaders.middleware.CorsMiddleware",
-    "django.middleware.common.CommonMiddleware",
+    "myapp.db_routing.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "myproject.urls"
@@ -93,28 +167,69 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "myproject.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
 #Database
 #https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'college_project_db',
-        'USER': 'root',
-        'PASSWORD': "",
-        'HOST': 'localhost',
-        'PORT':"3306",
-        'OPTIONS': {
-            'charset': 'utf8mb4',
+# Persistent connections: each worker thread keeps its connection open for
+# DB_CONN_MAX_AGE seconds (0 = close after every request, as before) and
+# pings it before reuse.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+
+if os.environ.get("DB_ENGINE") == "sqlite":
+    # local stand-in: DB_REPLICAS is a comma separated list of sqlite files
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            # select_for_update() is a no-op here; taking the write lock at
+            # BEGIN makes read-then-write transactions wait instead of
+            # failing with "database is locked" (Django 5.1+)
+            "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        }
+    }
+else:
+    # DB_REPLICAS is a comma separated list of MySQL replica hosts
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get("DB_NAME", 'college_project_db'),
+            'USER': os.environ.get("DB_USER", 'root'),
+            'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+            'HOST': os.environ.get("DB_HOST", 'localhost'),
+            'PORT': os.environ.get("DB_PORT", "3306"),
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+            }
         }
     }
+
+DATABASES["default"]["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = DB_CONN_MAX_AGE > 0
+
+for _i, _replica in enumerate(filter(None, os.environ.get("DB_REPLICAS", "").split(",")), start=1):
+    _key = "NAME" if os.environ.get("DB_ENGINE") == "sqlite" else "HOST"
+    DATABASES[f"replica_{_i}"] = {
+        **DATABASES["default"],
+        _key: _replica.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+# reads from views marked @use_replica go to replica_*, everything else
+# (and any read after a write by the same client) to default
+DATABASE_ROUTERS = ["myapp.db_routing.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 5
+
+# Cache
+# locmem is per process; point RESPONSE_CACHE_ALIAS at a shared backend
+# (redis/memcached) when running more than one worker.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "smart-rental",
+    }
 }
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_wsgi_application()
+
+# build the location autocomplete index now rather than on the first request
+from myapp import location_index  # noqa: E402
+
+location_index.warm()